@@ -0,0 +1,155 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Dict, Any
+
+import numpy as np
+
+
+@dataclass
+class _CacheEntry:
+    answer: str
+    created_at: float
+    size: int
+    embedding: Optional[np.ndarray] = None
+
+
+class AnswerCache:
+    def __init__(
+            self,
+            ttl_seconds: int,
+            max_entries: int,
+            max_bytes: int,
+            similarity_threshold: float = 0.0,
+            embed: Optional[Callable[[str], List[float]]] = None
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._embedding_memo: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.generation = 0
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        question = re.sub(r"\s+", " ", question.strip().lower())
+        return question.rstrip("?.! ")
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embed is not None and self.similarity_threshold > 0
+
+    def get(self, question: str) -> Optional[str]:
+        key = self.normalize(question)
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.answer
+
+        if self.semantic_enabled:
+            answer = self._get_similar(key)
+            if answer is not None:
+                return answer
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, question: str, answer: str, generation: Optional[int] = None):
+        # Answers computed before the last invalidation may describe a stale graph.
+        if generation is not None and generation != self.generation:
+            return
+
+        key = self.normalize(question)
+        embedding = self._embedding_for(key) if self.semantic_enabled else None
+        size = len(key.encode()) + len(answer.encode()) + (embedding.nbytes if embedding is not None else 0)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+
+            self._entries[key] = _CacheEntry(answer=answer, created_at=time.monotonic(), size=size, embedding=embedding)
+            self._size += size
+
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._embedding_memo.clear()
+            self._size = 0
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            self._size -= self._entries.pop(key).size
+
+    def _embedding_for(self, key: str) -> np.ndarray:
+        with self._lock:
+            embedding = self._embedding_memo.get(key)
+        if embedding is None:
+            embedding = np.asarray(self.embed(key), dtype=np.float32)
+            embedding /= np.linalg.norm(embedding) or 1.0
+            with self._lock:
+                self._embedding_memo[key] = embedding
+                while len(self._embedding_memo) > 64:
+                    self._embedding_memo.popitem(last=False)
+        return embedding
+
+    def _get_similar(self, key: str) -> Optional[str]:
+        embedding = self._embedding_for(key)
+        with self._lock:
+            candidates = [(k, entry) for k, entry in self._entries.items() if entry.embedding is not None]
+            if not candidates:
+                return None
+
+            scores = np.stack([entry.embedding for _, entry in candidates]) @ embedding
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+
+            best_key, entry = candidates[best]
+            self._entries.move_to_end(best_key)
+            self.semantic_hits += 1
+            return entry.answer
\ No newline at end of file
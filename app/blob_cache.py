@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+COPY_BLOCK_SIZE = 1024 * 1024
+STALE_TMP_SECONDS = 3600
+# Entries live in two-character subdirectories, so a file at the top level is never taken for one.
+STATS_FILE = "stats.json"
+
+
+class BlobCache:
+    """Content-addressed files on local disk, named by their sha256 and evicted least recently used first.
+
+    Files are written to a temporary name and renamed into place once their digest checks out, and
+    every read re-hashes the file, so a torn write or a flipped bit is never served. Several
+    processes may share a directory; each keeps its own LRU order and touches mtimes so a restart
+    picks the order back up.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.corrupt = 0
+        self._load()
+
+    def _load(self):
+        found = []
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                if entry.name.endswith(".tmp"):
+                    # Left behind by a process that died mid-write; a fresh one may still be in use.
+                    if time.time() - entry.stat().st_mtime > STALE_TMP_SECONDS:
+                        os.unlink(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, digest, size in sorted(found):
+            self._entries[digest] = size
+            self._size += size
+
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def read_into(self, digest: str, file_obj: BinaryIO, record: bool = True) -> bool:
+        """Copy a cached blob into file_obj; False, with file_obj left empty, when it is missing or corrupt.
+
+        Pass record=False when re-reading a blob just filled, so the lookup is not counted twice.
+        """
+        path = self.path_for(digest)
+        try:
+            source = open(path, "rb")
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += record
+                self._forget(digest)
+            return False
+
+        hasher = hashlib.sha256()
+        with source:
+            for block in iter(lambda: source.read(COPY_BLOCK_SIZE), b""):
+                hasher.update(block)
+                file_obj.write(block)
+
+        if hasher.hexdigest() != digest:
+            logger.warning(f"Cached blob {digest} failed its checksum, discarding it")
+            file_obj.seek(0)
+            file_obj.truncate()
+            with self._lock:
+                self.corrupt += 1
+                self.misses += record
+                self._remove(digest)
+            return False
+
+        with self._lock:
+            self.hits += record
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def fill(self, digest: str, write: Callable[[BinaryIO], bool]) -> bool:
+        """Store what write() produces under digest if it hashes to digest.
+
+        Returns False when write() fails or produces different content; nothing is cached then.
+        """
+        os.makedirs(os.path.dirname(self.path_for(digest)), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path_for(digest)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w+b") as tmp:
+                if not write(tmp):
+                    return False
+                tmp.flush()
+                os.fsync(tmp.fileno())
+                tmp.seek(0)
+                hasher = hashlib.sha256()
+                for block in iter(lambda: tmp.read(COPY_BLOCK_SIZE), b""):
+                    hasher.update(block)
+                size = tmp.tell()
+
+            if hasher.hexdigest() != digest:
+                logger.warning(f"Downloaded content does not match expected digest {digest}, not caching it")
+                return False
+            os.replace(tmp_path, self.path_for(digest))
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        with self._lock:
+            self._forget(digest)
+            self._entries[digest] = size
+            self._size += size
+            self._evict()
+        return True
+
+    def _forget(self, digest: str):
+        size = self._entries.pop(digest, None)
+        if size is not None:
+            self._size -= size
+
+    def _remove(self, digest: str):
+        self._forget(digest)
+        try:
+            os.unlink(self.path_for(digest))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._size > self.max_bytes and len(self._entries) > 1:
+            digest = next(iter(self._entries))
+            self._remove(digest)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for digest in list(self._entries):
+                self._remove(digest)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "corrupt": self.corrupt,
+            }
+
+    def publish_stats(self):
+        """Write stats() into the cache directory for processes that share it but never download, like the API."""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as tmp:
+                json.dump({**self.stats(), "published_at": datetime.utcnow().isoformat()}, tmp)
+            os.replace(tmp_path, os.path.join(self.directory, STATS_FILE))
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+
+def read_published_stats(directory: str) -> Optional[Dict[str, Any]]:
+    """What publish_stats() last wrote into directory, or None if nothing has been published yet."""
+    try:
+        with open(os.path.join(directory, STATS_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
\ No newline at end of file
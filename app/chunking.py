@@ -0,0 +1,119 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
+
+# A section may end after a paragraph whose hash hits this modulus, once it holds a quarter of max_chars.
+BOUNDARY_MODULUS = 8
+
+# Extraction separates PDF pages with this and marks docx headings as "#" * level + " " + title.
+PAGE_BREAK = "\f"
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+)$")
+# Plain-text lines that look like titles (short, no closing punctuation, capitalised) rank below marked ones.
+INFERRED_HEADING_LEVEL = 6
+INFERRED_HEADING_MAX_CHARS = 80
+INFERRED_HEADING_MAX_WORDS = 10
+
+
+@dataclass
+class _Block:
+    text: str
+    heading_level: Optional[int] = None
+    page_break: bool = False
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _is_boundary(paragraph: str) -> bool:
+    return int(content_hash(paragraph)[:8], 16) % BOUNDARY_MODULUS == 0
+
+
+def _inferred_heading(paragraph: str) -> bool:
+    words = paragraph.split()
+    if not words or len(paragraph) > INFERRED_HEADING_MAX_CHARS or len(words) > INFERRED_HEADING_MAX_WORDS:
+        return False
+    if paragraph[-1] in ".,;:!?" or not any(c.isalpha() for c in paragraph):
+        return False
+    capitalised = [word for word in words if word[0].isupper() or word[0].isdigit()]
+    return paragraph.isupper() or len(capitalised) == len(words)
+
+
+def _blocks(text: str, max_chars: int) -> Iterator[_Block]:
+    for page in text.split(PAGE_BREAK):
+        yield _Block("", page_break=True)
+        for line in page.splitlines():
+            paragraph = re.sub(r"\s+", " ", line).strip()
+            marked = HEADING_PATTERN.match(paragraph)
+            if marked:
+                yield _Block(marked.group(2)[:max_chars], heading_level=len(marked.group(1)))
+                continue
+            if _inferred_heading(paragraph):
+                yield _Block(paragraph, heading_level=INFERRED_HEADING_LEVEL)
+                continue
+
+            while len(paragraph) > max_chars:
+                cut = paragraph.rfind(". ", 0, max_chars)
+                cut = cut + 1 if cut > 0 else max_chars
+                yield _Block(paragraph[:cut].strip())
+                paragraph = paragraph[cut:].strip()
+            if paragraph:
+                yield _Block(paragraph)
+
+
+def split_sections(text: str, max_chars: int) -> List[str]:
+    """Group paragraphs into sections of at most max_chars, following the document's structure.
+
+    A heading starts a new section and a page break may end one, as long as the section already
+    holds a quarter of max_chars. Within a run of plain paragraphs, boundaries are picked from the
+    paragraphs' own content rather than running offsets, so an edit only changes the sections
+    around it and unchanged sections keep the same hash across versions. Each section is
+    prefixed with the headings it sits under, so a chunk keeps its place in the outline.
+    """
+    min_chars = max_chars // 4
+    sections: List[str] = []
+    headings: List[_Block] = []
+    current: List[str] = []
+    current_length = 0
+
+    def close():
+        nonlocal current, current_length
+        if current:
+            sections.append("\n".join(current))
+        current, current_length = [], 0
+
+    def open_with(block: _Block):
+        nonlocal current_length
+        if headings:
+            trail = " > ".join(heading.text for heading in headings)
+            current.append(f"[{trail}]"[:max_chars // 2])
+            current_length += len(current[0]) + 1
+
+    for block in _blocks(text, max_chars):
+        if block.page_break:
+            if current_length >= min_chars:
+                close()
+            continue
+
+        if block.heading_level is not None:
+            while headings and headings[-1].heading_level >= block.heading_level:
+                headings.pop()
+            if current_length >= min_chars:
+                close()
+
+        if current and current_length + len(block.text) + 1 > max_chars:
+            close()
+        if not current:
+            open_with(block)
+
+        current.append(block.text)
+        current_length += len(block.text) + 1
+
+        if block.heading_level is not None:
+            headings.append(block)
+        elif current_length >= min_chars and _is_boundary(block.text):
+            close()
+
+    close()
+    return sections
\ No newline at end of file
@@ -1,22 +1,98 @@
 import os
+import tempfile
+from typing import Optional
 
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     database_url: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    auth_principal_cache_ttl_seconds: int = 60
+    auth_principal_cache_max_entries: int = 4096
+    # Trust a token's uid/role claims without a lookup, but only during its first
+    # auth_principal_cache_ttl_seconds; other workers see a user's deletion within that window.
+    auth_trust_token_claims: bool = False
 
-    openai_api_key: str = os.getenv("OPENAI_API_KEY")
+    password_hash_workers: int = 2
+    password_hash_max_queued: int = 64
+    password_hash_retry_after_seconds: int = 2
+
+    openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY")
+    # "openai" calls the OpenAI API. "fake" answers and embeds locally and deterministically,
+    # for benchmarks and offline runs; the latencies below are added to each of its calls.
+    llm_provider: str = "openai"
+    fake_llm_latency_seconds: float = 0.0
+    fake_llm_jitter_seconds: float = 0.0
+    fake_embedding_latency_seconds: float = 0.0
+    fake_llm_seed: int = 0
+    fake_llm_max_entities: int = 12
 
     aws_access_key_id: str
     aws_secret_access_key: str
     aws_region: str = "us-east-1"
     s3_bucket_name: str
+    s3_endpoint_url: Optional[str] = None  # e.g. a MinIO or other S3-compatible server
+    s3_multipart_threshold: int = 8 * 1024 * 1024
+    s3_part_size: int = 8 * 1024 * 1024
+    s3_max_concurrency: int = 4
+    s3_cache_enabled: bool = True
+    # Outside the source tree by default; deployments point it at a persistent volume.
+    s3_cache_dir: str = os.path.join(tempfile.gettempdir(), "nsf_ai_app", "s3_cache")
+    s3_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
 
     graphrag_working_dir: str = "./nsf_graphrag_knowledge"
+    graphrag_warm_up: bool = True
+    # "pickle" or "mmap"; mmap maps chunks and sparse maps, the entity embeddings still load per process.
+    graphrag_storage_backend: str = "pickle"
+    # "standalone" reads and writes the working directory in place. Use "reader" for the API
+    # workers and "writer" for the single ingestion worker to serve from published snapshots.
+    graphrag_role: str = "standalone"
+    graphrag_reload_poll_seconds: float = 2.0
+    # Must be outside the working directory, which fast_graphrag expects to hold no other directories.
+    graphrag_snapshot_dir: str = "./nsf_graphrag_snapshots"
+    graphrag_snapshot_retention: int = 3
+
+    ingestion_max_attempts: int = 3
+    ingestion_retry_backoff_seconds: int = 30
+    ingestion_job_stale_seconds: int = 1800
+    ingestion_poll_seconds: float = 2.0
+    ingestion_batch_size: int = 16
+    ingestion_extract_workers: int = 4
+    chunk_max_chars: int = 2400
+    graph_removal_batch_size: int = 1024
+
+    pdf_extract_processes: int = 4
+    pdf_pages_per_task: int = 16
+    pdf_page_timeout_seconds: float = 30.0
+
+    graphrag_query_workers: int = 8
+    graphrag_max_in_flight: int = 8
+    graphrag_max_queued: int = 64
+    graphrag_max_queued_per_user: int = 8
+    graphrag_retry_after_seconds: int = 5
+
+    query_rewrite_cache_size: int = 1024
+    query_rewrite_speculative: bool = True
+
+    answer_cache_enabled: bool = True
+    answer_cache_ttl_seconds: int = 3600
+    answer_cache_max_entries: int = 512
+    answer_cache_max_bytes: int = 8 * 1024 * 1024
+    answer_cache_similarity_threshold: float = 0.0
+
+    batch_max_questions: int = 100
+    # Capped at graphrag_max_queued_per_user so a batch never trips the per-user queue limit.
+    batch_max_parallel: int = 4
+    # Questions whose embeddings are at least this similar share one retrieval; 0 turns sharing off.
+    batch_share_retrieval_threshold: float = 0.95
 
     class Config:
         env_file = ".env"
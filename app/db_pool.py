@@ -0,0 +1,87 @@
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+LATENCY_SAMPLES = 1024
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.peak_checked_out = 0
+
+    def record_checkout(self, seconds: float, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self._latencies.append(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def _percentile(self, samples, fraction: float) -> float:
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._latencies)
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_checkout_ms": round(self.total_wait_seconds / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "p95_checkout_ms": round(self._percentile(samples, 0.95) * 1000, 3),
+                "max_checkout_ms": round(self.max_wait_seconds * 1000, 3),
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+class _TimedPoolMixin:
+    """Times every checkout, including waits for a free slot, pre-ping and new connections."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - start, self.checkedout())
+        return connection
+
+    def stats(self) -> dict:
+        capacity = self.size() + max(self._max_overflow, 0)
+        checked_out = self.checkedout()
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": checked_out,
+            "checked_in": self.checkedin(),
+            "overflow": self.overflow(),
+            "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+            **self.metrics.stats(),
+        }
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
\ No newline at end of file
@@ -0,0 +1,177 @@
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional, Tuple
+
+from app.chunking import PAGE_BREAK
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pdf_executor: Optional[ProcessPoolExecutor] = None
+_pdf_executor_lock = threading.Lock()
+_open_reader = (None, None)
+
+
+class PageTimeout(Exception):
+    pass
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeout()
+
+
+def _extract_page(page, page_number: int, timeout: float) -> str:
+    use_alarm = (
+        timeout > 0
+        and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_page_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return page.extract_text() or ""
+    except PageTimeout:
+        logger.warning(f"Skipping PDF page {page_number}: extraction took longer than {timeout}s")
+        return ""
+    except Exception as e:
+        logger.warning(f"Skipping PDF page {page_number}: {str(e)}")
+        return ""
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _get_reader(path: str):
+    import PyPDF2
+
+    # Consecutive page ranges of one file usually land on the same worker, so keep its parsed reader around.
+    global _open_reader
+    key = (path, os.stat(path).st_mtime_ns)
+    if _open_reader[0] != key:
+        _open_reader = (key, PyPDF2.PdfReader(path))
+    return _open_reader[1]
+
+
+def _extract_page_range(path: str, start: int, stop: int, page_timeout: float) -> List[str]:
+    reader = _get_reader(path)
+    return [_extract_page(reader.pages[i], i + 1, page_timeout) for i in range(start, stop)]
+
+
+def _get_pdf_executor() -> ProcessPoolExecutor:
+    global _pdf_executor
+    # Extraction threads ask for the pool at the same time; only one of them may create it.
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            # Spawned workers do not inherit the parent's threads or open sockets.
+            _pdf_executor = ProcessPoolExecutor(
+                max_workers=settings.pdf_extract_processes,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_executor
+
+
+def _discard_pdf_executor(executor: ProcessPoolExecutor):
+    """Drop a pool that a dead child broke, unless another thread has already replaced it."""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is executor:
+            _pdf_executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit_page_range(path: str, start: int, stop: int, page_timeout: float) -> Tuple[ProcessPoolExecutor, Future]:
+    executor = _get_pdf_executor()
+    try:
+        return executor, executor.submit(_extract_page_range, path, start, stop, page_timeout)
+    except BrokenProcessPool:
+        _discard_pdf_executor(executor)
+        executor = _get_pdf_executor()
+        return executor, executor.submit(_extract_page_range, path, start, stop, page_timeout)
+
+
+def _page_range_result(path: str, start: int, stop: int, page_timeout: float,
+                       executor: ProcessPoolExecutor, future: Future) -> List[str]:
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        _discard_pdf_executor(executor)
+
+    # A child died (out of memory, or a crash in the PDF parser), possibly on this range: try it
+    # once more on a fresh pool and skip its pages if that dies too.
+    executor, future = _submit_page_range(path, start, stop, page_timeout)
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        _discard_pdf_executor(executor)
+        logger.warning(f"Skipping PDF pages {start + 1}-{stop}: extraction crashed its worker process")
+        return [""] * (stop - start)
+
+
+def iter_pdf_pages(path: str) -> Iterator[str]:
+    import PyPDF2
+
+    page_count = len(PyPDF2.PdfReader(path).pages)
+    pages_per_task = settings.pdf_pages_per_task
+    page_timeout = settings.pdf_page_timeout_seconds
+
+    if settings.pdf_extract_processes <= 1:
+        yield from _extract_page_range(path, 0, page_count, page_timeout)
+        return
+
+    ranges = iter(range(0, page_count, pages_per_task))
+    pending = deque()
+    # Keep a bounded window of page ranges in flight so memory stays flat on large reports.
+    max_pending = settings.pdf_extract_processes * 2
+
+    def submit_next():
+        start = next(ranges, None)
+        if start is not None:
+            stop = min(start + pages_per_task, page_count)
+            pending.append((start, stop, *_submit_page_range(path, start, stop, page_timeout)))
+
+    for _ in range(max_pending):
+        submit_next()
+
+    while pending:
+        start, stop, executor, future = pending.popleft()
+        pages = _page_range_result(path, start, stop, page_timeout, executor, future)
+        submit_next()
+        yield from pages
+
+
+def extract_docx_text(path: str) -> str:
+    from docx import Document
+
+    doc = Document(path)
+
+    text_parts = []
+    for paragraph in doc.paragraphs:
+        text = paragraph.text.strip()
+        if not text:
+            continue
+        # Keep the outline so chunking can split along it: "Heading 2" becomes "## ...".
+        style = paragraph.style.name if paragraph.style is not None else ""
+        if style == "Title":
+            text = f"# {text}"
+        elif style.startswith("Heading ") and style[8:].isdigit():
+            text = f"{'#' * min(int(style[8:]), 6)} {text}"
+        text_parts.append(text)
+
+    return "\n".join(text_parts)
+
+
+def extract_file_text(filename: str, path: str) -> str:
+    """Text of a downloaded file; PDF pages are extracted on the process pool, never read into memory whole."""
+    if filename.lower().endswith('.pdf'):
+        return PAGE_BREAK.join(iter_pdf_pages(path)).strip()
+    elif filename.lower().endswith(('.docx', '.doc')):
+        return extract_docx_text(path)
+    raise ValueError("Unsupported file type")
\ No newline at end of file
@@ -0,0 +1,86 @@
+import asyncio
+import re
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+from fast_graphrag._llm import BaseEmbeddingService, BaseLLMService
+from fast_graphrag._models import BaseModelAlias, TAnswer, TEditRelationList, TEntityDescription, TQueryEntities
+from fast_graphrag._services._information_extraction import TGleaningStatus
+from fast_graphrag._types import TGraph
+
+from app.llm_providers import FakeProvider
+
+
+def _section(prompt: str, start: str, end: str) -> str:
+    # Prompts quote worked examples first, so the real input is the last occurrence.
+    begin = prompt.rfind(start)
+    if begin < 0:
+        return ""
+    begin += len(start)
+    stop = prompt.find(end, begin)
+    return prompt[begin:stop if stop >= 0 else len(prompt)].strip()
+
+
+@dataclass
+class FakeLLMService(BaseLLMService):
+    """Answers fast_graphrag's extraction, summarisation and answer prompts with FakeProvider."""
+
+    provider: Optional[FakeProvider] = field(default=None)
+
+    async def send_message(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        history_messages: Optional[List[dict]] = None,
+        response_model: Any = None,
+        **kwargs: Any
+    ) -> Tuple[Any, List[dict]]:
+        await asyncio.sleep(self.provider.delay_for(prompt, self.provider.latency))
+        response = self._respond(prompt, history_messages, response_model)
+
+        messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        messages.extend(history_messages or [])
+        messages.append({"role": "user", "content": prompt})
+        messages.append({
+            "role": "assistant",
+            "content": response.model_dump_json() if hasattr(response, "model_dump_json") else str(response)
+        })
+        if response_model is not None and issubclass(response_model, BaseModelAlias):
+            response = response.to_dataclass(response)
+        return response, messages
+
+    def _respond(self, prompt: str, history_messages: Optional[List[dict]], response_model: Any) -> Any:
+        provider = self.provider
+        if response_model is TGraph:
+            if history_messages:
+                # Gleaning asks for what the first pass missed; the fake never misses anything.
+                graph = {"entities": [], "relationships": [], "other_relationships": []}
+            else:
+                entity_types = _section(prompt, "**Entity Types**:", "<<ENTITY_TYPES_END>>")
+                graph = provider.extract_graph(
+                    _section(prompt, "**Document**:", "<<DOCUMENT_END>>"),
+                    [name.strip(" '\"[]") for name in re.split(r"[,\n]", entity_types) if name.strip(" '\"[]")]
+                )
+            return TGraph.Model.model_validate(graph)
+        if response_model is TGleaningStatus:
+            return TGleaningStatus(status="done")
+        if response_model is TQueryEntities:
+            named, generic = provider.query_entities(_section(prompt, "Query:", "\nOutput:"))
+            return TQueryEntities(named=named, generic=generic)
+        if response_model is TEntityDescription:
+            return TEntityDescription(description=provider.summarize(_section(prompt, "Current:", "\n\nUpdated:")))
+        if response_model is TEditRelationList:
+            return TEditRelationList.model_validate({"grouped_facts": []})
+        if response_model is TAnswer:
+            return TAnswer(answer=provider.respond(prompt))
+        return provider.respond(prompt)
+
+
+@dataclass
+class FakeEmbeddingService(BaseEmbeddingService):
+    provider: Optional[FakeProvider] = field(default=None)
+
+    async def encode(self, texts: List[str], model: Optional[str] = None) -> np.ndarray:
+        await asyncio.sleep(self.provider.delay_for("\n".join(texts), self.provider.embedding_latency))
+        return self.provider.embed_now(texts)
\ No newline at end of file
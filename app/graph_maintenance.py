@@ -0,0 +1,94 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, List, Set
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PruneResult:
+    chunks: int = 0
+    relationships: int = 0
+    entities: int = 0
+
+
+async def prune(state_manager, drop_chunk: Callable[[Any], bool]) -> PruneResult:
+    """Drop the chunks drop_chunk selects, then what they leave orphaned.
+
+    A relationship goes once none of the chunks it was extracted from remain, and an entity goes
+    once the relationships removed here were its last ones; entities extracted without any
+    relationship are left alone. Call between the state manager's insert_start() and insert_done(),
+    which rebuilds map_r2c and map_e2r from what is left.
+    """
+    result = PruneResult()
+    chunk_storage = state_manager.chunk_storage
+    result.chunks = len(await _drop_chunks(chunk_storage, drop_chunk))
+
+    graph = state_manager.graph_storage._graph
+    if graph is None or graph.ecount() == 0:
+        return result
+
+    live = {chunk.id for chunk in (chunk_storage._data or {}).values()}
+    chunk_lists = [[chunk_id for chunk_id in (chunk_ids or []) if chunk_id in live] for chunk_ids in graph.es["chunks"]]
+    graph.es["chunks"] = chunk_lists
+    orphaned = [index for index, chunk_ids in enumerate(chunk_lists) if not chunk_ids]
+    if not orphaned:
+        return result
+
+    endpoints = {vertex for index in orphaned for vertex in graph.es[index].tuple}
+    graph.delete_edges(orphaned)
+    result.relationships = len(orphaned)
+
+    isolated = sorted(vertex for vertex in endpoints if graph.degree(vertex) == 0)
+    if isolated:
+        _drop_entities(state_manager, isolated)
+        result.entities = len(isolated)
+    return result
+
+
+async def _drop_chunks(chunk_storage, drop_chunk: Callable[[Any], bool]) -> Set[Any]:
+    chunks = [chunk for _, chunk in sorted((chunk_storage._data or {}).items())]
+    kept = [chunk for chunk in chunks if not drop_chunk(chunk)]
+    removed = {chunk.id for chunk in chunks} - {chunk.id for chunk in kept}
+    if removed:
+        # Re-pack the survivors: map_r2c is sized by the chunk count, so indices must stay dense.
+        chunk_storage._data, chunk_storage._key_to_index, chunk_storage._free_indices = {}, {}, []
+        chunk_storage._np_keys = None
+        await chunk_storage.upsert([chunk.id for chunk in kept], kept)
+    return removed
+
+
+def _drop_entities(state_manager, vertices: List[int]):
+    """Delete graph vertices and renumber the entity vectors, which are keyed by vertex index."""
+    import hnswlib
+
+    graph = state_manager.graph_storage._graph
+    entity_storage = state_manager.entity_storage
+    old_index = entity_storage._index
+
+    kept = np.setdiff1d(np.arange(graph.vcount()), vertices)
+    renumbered = {int(old): new for new, old in enumerate(kept)}
+    stored = set(old_index.get_ids_list())
+    moved = [old for old in renumbered if old in stored]
+    graph.delete_vertices(vertices)
+
+    index = hnswlib.Index(space="cosine", dim=entity_storage.embedding_dim)
+    index.init_index(
+        max_elements=old_index.get_max_elements(),
+        ef_construction=entity_storage.config.ef_construction,
+        M=entity_storage.config.M,
+        allow_replace_deleted=True
+    )
+    index.set_ef(entity_storage.config.ef_search)
+    if moved:
+        index.add_items(
+            data=np.asarray(old_index.get_items(moved), dtype=np.float32),
+            ids=[renumbered[old] for old in moved],
+            num_threads=entity_storage.config.num_threads
+        )
+    entity_storage._index = index
+    entity_storage._metadata = {
+        renumbered[old]: value for old, value in entity_storage._metadata.items() if old in renumbered
+    }
\ No newline at end of file
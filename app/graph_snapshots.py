@@ -0,0 +1,169 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CURRENT_POINTER = "CURRENT"
+WRITER_LOCK = ".writer.lock"
+STAGING_PREFIX = ".staging-"
+MANIFEST = "MANIFEST.json"
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# fast_graphrag names every store file "<namespace>_<resource>".
+STORE_NAMESPACES = ("graph", "entities", "chunks", "map_e2r", "map_r2c")
+
+
+def _store_for(filename: str) -> Optional[str]:
+    matches = [namespace for namespace in STORE_NAMESPACES if filename.startswith(f"{namespace}_")]
+    return max(matches, key=len) if matches else None
+
+
+def store_digests(path: str, content: bool = True) -> Dict[str, str]:
+    """Digest each store's files; with content=False only their sizes and mtimes are hashed."""
+    digests = {}
+    try:
+        entries = sorted((entry for entry in os.scandir(path) if entry.is_file()), key=lambda entry: entry.name)
+    except FileNotFoundError:
+        return {}
+
+    for entry in entries:
+        store = _store_for(entry.name)
+        if store is None:
+            continue
+        digest = digests.setdefault(store, hashlib.sha256())
+        digest.update(entry.name.encode())
+        if content:
+            with open(entry.path, "rb") as f:
+                for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                    digest.update(block)
+        else:
+            stat = entry.stat()
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return {store: digest.hexdigest() for store, digest in digests.items()}
+
+
+def store_sizes(path: str) -> Dict[str, int]:
+    """Bytes on disk per store."""
+    sizes: Dict[str, int] = {}
+    try:
+        entries = [entry for entry in os.scandir(path) if entry.is_file()]
+    except FileNotFoundError:
+        return {}
+
+    for entry in entries:
+        store = _store_for(entry.name)
+        if store is not None:
+            sizes[store] = sizes.get(store, 0) + entry.stat().st_size
+    return sizes
+
+
+def write_manifest(path: str, version: str):
+    manifest = {"version": version, "stores": store_digests(path)}
+    target = os.path.join(path, MANIFEST)
+    with open(f"{target}.tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{target}.tmp", target)
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        # Written before manifests existed, or by hand: fall back to what the file system reports.
+        return {"version": None, "stores": store_digests(path, content=False)}
+
+
+class SnapshotStore:
+    """Versioned copies of the knowledge graph in a directory beside its working directory.
+
+    The writer builds each new version in a staging directory, renames it into place and then
+    swaps the CURRENT pointer file, so readers only ever open complete, immutable snapshots. Until
+    the first version is published, the working directory itself is the current snapshot.
+
+    Snapshots never live inside the working directory: fast_graphrag treats every subdirectory
+    there as a numbered checkpoint and fails to open a graph that has any other.
+    """
+
+    def __init__(self, root: str, snapshots_dir: str, retention: int):
+        self.root = root
+        self.retention = retention
+        self.snapshots_dir = snapshots_dir
+
+    def current_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.snapshots_dir, CURRENT_POINTER)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def path_for(self, version: Optional[str]) -> str:
+        if version is None:
+            return self.root
+        return os.path.join(self.snapshots_dir, version)
+
+    def versions(self) -> List[str]:
+        try:
+            return sorted(
+                entry.name for entry in os.scandir(self.snapshots_dir)
+                if entry.is_dir() and not entry.name.startswith(STAGING_PREFIX)
+            )
+        except FileNotFoundError:
+            return []
+
+    @contextmanager
+    def publish(self) -> Iterator[str]:
+        """Yield a staging copy of the current snapshot and publish it if the block succeeds."""
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        with open(os.path.join(self.snapshots_dir, WRITER_LOCK), "w") as lock:
+            # A second writer waits here rather than racing on the same base version.
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                base_version = self.current_version()
+                versions = self.versions()
+                version = f"{int(versions[-1]) + 1 if versions else 1:08d}"
+                staging = os.path.join(self.snapshots_dir, f"{STAGING_PREFIX}{version}")
+                shutil.rmtree(staging, ignore_errors=True)
+                self._copy_snapshot(self.path_for(base_version), staging)
+
+                try:
+                    yield staging
+                except BaseException:
+                    shutil.rmtree(staging, ignore_errors=True)
+                    raise
+
+                write_manifest(staging, version)
+                os.rename(staging, self.path_for(version))
+                self._write_pointer(version)
+                logger.info(f"Published knowledge graph snapshot {version}")
+                self._prune(version)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _copy_snapshot(self, source: str, target: str):
+        os.makedirs(target)
+        if not os.path.isdir(source):
+            return
+        # Only the store files: the working directory may also hold fast_graphrag's own leftovers.
+        for entry in os.scandir(source):
+            if entry.is_file() and _store_for(entry.name) is not None:
+                shutil.copy2(entry.path, os.path.join(target, entry.name))
+
+    def _write_pointer(self, version: str):
+        pointer = os.path.join(self.snapshots_dir, CURRENT_POINTER)
+        with open(f"{pointer}.tmp", "w") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{pointer}.tmp", pointer)
+
+    def _prune(self, current: str):
+        stale = [version for version in self.versions() if version != current]
+        for version in stale[:max(len(stale) - (self.retention - 1), 0)]:
+            shutil.rmtree(self.path_for(version), ignore_errors=True)
\ No newline at end of file
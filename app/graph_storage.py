@@ -0,0 +1,329 @@
+"""Memory-mapped storages for the knowledge graph.
+
+Each store is a single file: a JSON header followed by 8-byte aligned NumPy arrays. Readers map
+the file and build zero-copy views, so loading is near-instant and every worker process shares
+the same pages through the OS cache. Writers build the whole file next to the old one and swap
+it in with os.replace.
+
+Only the chunk store and the sparse maps are mapped. The igraph graph and the HNSW entity index
+keep their native formats, and hnswlib's load_index reads the entity embeddings fully into each
+process's memory: hnswlib cannot search a mapped file, and an exact scan over mapped vectors
+would change which entities a query retrieves. With this backend the embeddings are therefore
+still the part of the graph that grows per worker.
+"""
+import json
+import mmap
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from fast_graphrag._services import DefaultStateManagerService
+from fast_graphrag._storage._base import BaseBlobStorage, BaseIndexedKeyValueStorage
+from fast_graphrag._types import TChunk, THash, TIndex
+from fast_graphrag._utils import logger
+
+MAGIC = b"NSFMMAP1"
+ALIGNMENT = 8
+
+
+def _align(position: int) -> int:
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_mapped_file(path: str, arrays: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None):
+    layout, position = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[name] = array
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position = _align(position + array.nbytes)
+
+    header = json.dumps({"meta": meta or {}, "arrays": layout}).encode()
+    base = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(base + layout[name]["offset"])
+            f.write(array.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_mapped_file(path: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not a mapped storage file: {path}")
+    header_length = int.from_bytes(mapped[len(MAGIC):len(MAGIC) + 8], "little")
+    header_start = len(MAGIC) + 8
+    header = json.loads(mapped[header_start:header_start + header_length])
+    base = _align(header_start + header_length)
+
+    # The views keep the mapping alive; nothing is copied into the process heap.
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+        arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=base + spec["offset"]).reshape(spec["shape"])
+    return header["meta"], arrays
+
+
+@dataclass
+class _MappedChunks:
+    size: int
+    offsets: np.ndarray
+    keys: np.ndarray
+    valid: np.ndarray
+    sorted_keys: np.ndarray
+    sorted_slots: np.ndarray
+    records: np.ndarray
+
+
+@dataclass
+class MmapChunkStorage(BaseIndexedKeyValueStorage[THash, TChunk]):
+    """Chunk store laid out as an offset index over JSON records, looked up by binary search on sorted keys.
+
+    Queries read straight from the mapping. Inserts load the records into dicts, the same shape
+    PickleIndexedKeyValueStorage uses, and write a fresh file when they finish.
+    """
+
+    RESOURCE_NAME = "kv_data.mmap"
+    PICKLE_RESOURCE_NAME = "kv_data.pkl"
+
+    _data: Optional[Dict[TIndex, TChunk]] = field(init=False, default=None)
+    _key_to_index: Dict[THash, TIndex] = field(init=False, default_factory=dict)
+    _free_indices: List[TIndex] = field(init=False, default_factory=list)
+    _np_keys: Optional[np.ndarray] = field(init=False, default=None)
+    _mapped: Optional[_MappedChunks] = field(init=False, default=None)
+
+    @staticmethod
+    def write(path: str, data: Dict[TIndex, TChunk], key_to_index: Dict[THash, TIndex]):
+        slots = max(data) + 1 if data else 0
+        offsets = np.zeros(slots + 1, dtype=np.int64)
+        keys = np.zeros(slots, dtype=np.int64)
+        valid = np.zeros(slots, dtype=bool)
+        for key, index in key_to_index.items():
+            keys[index] = key
+            valid[index] = index in data
+
+        records = []
+        position = 0
+        for index in range(slots):
+            chunk = data.get(index)
+            if chunk is not None:
+                record = json.dumps({"content": chunk.content, "metadata": chunk.metadata}, default=str).encode()
+                records.append(record)
+                position += len(record)
+            offsets[index + 1] = position
+
+        valid_slots = np.flatnonzero(valid)
+        order = np.argsort(keys[valid_slots], kind="stable")
+        write_mapped_file(path, {
+            "offsets": offsets,
+            "keys": keys,
+            "valid": valid,
+            "sorted_keys": keys[valid_slots][order],
+            "sorted_slots": valid_slots[order].astype(np.int64),
+            "records": np.frombuffer(b"".join(records), dtype=np.uint8),
+        }, meta={"size": int(valid.sum())})
+
+    async def size(self) -> int:
+        if self._mapped is not None:
+            return self._mapped.size
+        return len(self._data or {})
+
+    async def get(self, keys: Iterable[THash]) -> Iterable[Optional[TChunk]]:
+        return await self.get_by_index(await self.get_index(keys))
+
+    async def get_by_index(self, indices: Iterable[Optional[TIndex]]) -> Iterable[Optional[TChunk]]:
+        if self._mapped is None:
+            data = self._data or {}
+            return [data.get(index, None) for index in indices]
+        return [self._read_record(index) for index in indices]
+
+    async def get_index(self, keys: Iterable[THash]) -> Iterable[Optional[TIndex]]:
+        if self._mapped is None:
+            return [self._key_to_index.get(key, None) for key in keys]
+
+        keys = np.asarray(list(keys), dtype=np.int64)
+        if len(keys) == 0 or len(self._mapped.sorted_keys) == 0:
+            return [None] * len(keys)
+        positions = np.searchsorted(self._mapped.sorted_keys, keys)
+        positions = np.minimum(positions, len(self._mapped.sorted_keys) - 1)
+        found = self._mapped.sorted_keys[positions] == keys
+        slots = self._mapped.sorted_slots[positions]
+        return [TIndex(slot) if hit else None for slot, hit in zip(slots, found)]
+
+    async def upsert(self, keys: Iterable[THash], values: Iterable[TChunk]) -> None:
+        self._materialize()
+        for key, value in zip(keys, values):
+            index = self._key_to_index.get(key, None)
+            if index is None:
+                index = self._free_indices.pop() if self._free_indices else TIndex(len(self._data))
+                self._key_to_index[key] = index
+                self._np_keys = None
+            self._data[index] = value
+
+    async def delete(self, keys: Iterable[THash]) -> None:
+        self._materialize()
+        for key in keys:
+            index = self._key_to_index.pop(key, None)
+            if index is not None:
+                self._free_indices.append(index)
+                self._data.pop(index, None)
+                self._np_keys = None
+            else:
+                logger.warning(f"Key '{key}' not found in indexed key-value storage.")
+
+    async def mask_new(self, keys: Iterable[THash]) -> Iterable[bool]:
+        keys = np.asarray(list(keys), dtype=np.int64)
+        if len(keys) == 0:
+            return np.array([], dtype=bool)
+
+        if self._mapped is not None:
+            return ~np.isin(keys, self._mapped.sorted_keys)
+        if self._np_keys is None:
+            self._np_keys = np.fromiter(self._key_to_index.keys(), count=len(self._key_to_index), dtype=np.int64)
+        return ~np.isin(keys, self._np_keys)
+
+    def _read_record(self, index: Optional[TIndex]) -> Optional[TChunk]:
+        mapped = self._mapped
+        if index is None or index < 0 or index >= len(mapped.valid) or not mapped.valid[index]:
+            return None
+        record = json.loads(mapped.records[mapped.offsets[index]:mapped.offsets[index + 1]].tobytes())
+        return TChunk(id=THash(mapped.keys[index]), content=record["content"], metadata=record["metadata"])
+
+    def _materialize(self):
+        if self._mapped is None:
+            if self._data is None:
+                self._data = {}
+            return
+
+        mapped = self._mapped
+        self._data, self._key_to_index, self._free_indices = {}, {}, []
+        for index in range(len(mapped.valid)):
+            if mapped.valid[index]:
+                chunk = self._read_record(index)
+                self._data[index] = chunk
+                self._key_to_index[chunk.id] = index
+            else:
+                self._free_indices.append(index)
+        self._mapped = None
+        self._np_keys = None
+
+    def _load(self):
+        self._data, self._key_to_index, self._free_indices = None, {}, []
+        self._mapped, self._np_keys = None, None
+        if not self.namespace:
+            return
+
+        path = self.namespace.get_load_path(self.RESOURCE_NAME)
+        if path and os.path.exists(path):
+            meta, arrays = read_mapped_file(path)
+            self._mapped = _MappedChunks(size=meta["size"], **arrays)
+            logger.debug(f"Mapped {meta['size']} elements from chunk storage '{path}'.")
+            return
+
+        pickle_path = self.namespace.get_load_path(self.PICKLE_RESOURCE_NAME)
+        if pickle_path and os.path.exists(pickle_path):
+            logger.warning(f"Loading pickled chunk storage '{pickle_path}'; run scripts/convert_graph_storage.py to map it.")
+            with open(pickle_path, "rb") as f:
+                self._data, self._free_indices, self._key_to_index = pickle.load(f)
+            return
+
+        logger.info("No data file found for chunk storage. Loading empty storage.")
+        self._data = {}
+
+    async def _insert_start(self):
+        self._load()
+        self._materialize()
+
+    async def _insert_done(self):
+        if self.namespace:
+            self.write(self.namespace.get_save_path(self.RESOURCE_NAME), self._data or {}, self._key_to_index)
+
+    async def _query_start(self):
+        self._load()
+
+    async def _query_done(self):
+        pass
+
+
+@dataclass
+class MmapBlobStorage(BaseBlobStorage[csr_matrix]):
+    """Sparse entity/relationship/chunk maps stored as the three CSR arrays."""
+
+    RESOURCE_NAME = "blob_data.mmap"
+    PICKLE_RESOURCE_NAME = "blob_data.pkl"
+
+    _data: Optional[csr_matrix] = field(init=False, default=None)
+
+    @staticmethod
+    def write(path: str, blob: Optional[csr_matrix]):
+        if blob is None:
+            write_mapped_file(path, {}, meta={"empty": True})
+            return
+        # Rebuild so the index arrays use the dtype scipy picks on load; a mismatch would copy them there.
+        blob = csr_matrix(blob)
+        blob = csr_matrix((blob.data, blob.indices, blob.indptr), shape=blob.shape)
+        write_mapped_file(path, {
+            "data": blob.data,
+            "indices": blob.indices,
+            "indptr": blob.indptr,
+        }, meta={"shape": list(blob.shape)})
+
+    async def get(self) -> Optional[csr_matrix]:
+        return self._data
+
+    async def set(self, blob: csr_matrix) -> None:
+        self._data = blob
+
+    def _load(self):
+        self._data = None
+        if not self.namespace:
+            return
+
+        path = self.namespace.get_load_path(self.RESOURCE_NAME)
+        if path and os.path.exists(path):
+            meta, arrays = read_mapped_file(path)
+            if not meta.get("empty"):
+                self._data = csr_matrix(
+                    (arrays["data"], arrays["indices"], arrays["indptr"]), shape=tuple(meta["shape"]), copy=False
+                )
+            return
+
+        pickle_path = self.namespace.get_load_path(self.PICKLE_RESOURCE_NAME)
+        if pickle_path and os.path.exists(pickle_path):
+            logger.warning(f"Loading pickled blob storage '{pickle_path}'; run scripts/convert_graph_storage.py to map it.")
+            with open(pickle_path, "rb") as f:
+                self._data = pickle.load(f)
+            return
+
+        logger.info("No data file found for blob storage. Loading empty blob.")
+
+    async def _insert_start(self):
+        self._load()
+
+    async def _insert_done(self):
+        if self.namespace:
+            self.write(self.namespace.get_save_path(self.RESOURCE_NAME), self._data)
+
+    async def _query_start(self):
+        self._load()
+
+    async def _query_done(self):
+        pass
+
+
+@dataclass
+class MmapStateManagerService(DefaultStateManagerService):
+    blob_storage_cls: Type[BaseBlobStorage[csr_matrix]] = field(default=MmapBlobStorage)
\ No newline at end of file
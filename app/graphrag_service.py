@@ -1,15 +1,24 @@
-import os
-from typing import List, Dict, Optional
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-import openai
-from fast_graphrag import GraphRAG
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Iterator, Iterable, AsyncIterator, Any, Callable, Set, Tuple
+import numpy as np
 from app.config import settings
+from app.answer_cache import AnswerCache
+from app.graph_maintenance import PruneResult, prune
+from app.graph_snapshots import SnapshotStore, read_manifest, write_manifest
+from app.llm_providers import llm_provider
+from app.query_scheduler import query_scheduler, QueryQueueFull
+from app.query_rewriter import QueryRewriter, same_question
 import logging
 
 logger = logging.getLogger(__name__)
 
-os.environ['OPENAI_API_KEY'] = settings.openai_api_key
+if settings.openai_api_key:
+    os.environ['OPENAI_API_KEY'] = settings.openai_api_key
 
 DOMAIN = """
 Analyze documents from Next Step Foundation, a disability inclusion and employment organization in Kenya. 
@@ -51,6 +60,9 @@ EXAMPLE_QUERIES = [
     "How does NSF demonstrate sustainability and long-term impact in their programs?"
 ]
 
+LLM_MODEL = "gpt-4o-mini"
+EMBEDDING_MODEL = "text-embedding-3-small"
+
 ENTITY_TYPES = [
     "Person", "Organization", "Program", "Location", "Skill", "Technology",
     "Outcome", "Challenge", "Method", "Metric", "Funding", "Accommodation",
@@ -59,20 +71,210 @@ ENTITY_TYPES = [
 ]
 
 
+def _fail_response() -> str:
+    from fast_graphrag._prompt import PROMPTS
+
+    return PROMPTS["fail_response"]
+
+
+@dataclass
+class _Speculation:
+    future: Future
+    rewrite_seconds: float
+
+
 class GraphRAGService:
     def __init__(self):
         self.grag = None
-        self.openai_client = openai.OpenAI(api_key=settings.openai_api_key)
-        self._initialize()
+        self.llm = llm_provider
+        self.answer_cache = AnswerCache(
+            ttl_seconds=settings.answer_cache_ttl_seconds,
+            max_entries=settings.answer_cache_max_entries,
+            max_bytes=settings.answer_cache_max_bytes,
+            similarity_threshold=settings.answer_cache_similarity_threshold,
+            embed=self._embed
+        )
+        self.query_rewriter = QueryRewriter(self._preprocess_message, settings.query_rewrite_cache_size)
+        self._speculative_executor = ThreadPoolExecutor(
+            max_workers=settings.graphrag_query_workers,
+            thread_name_prefix="graphrag-speculative"
+        )
+        self.snapshots = SnapshotStore(
+            settings.graphrag_working_dir,
+            settings.graphrag_snapshot_dir,
+            settings.graphrag_snapshot_retention
+        )
+        self.snapshot_version: Optional[str] = None
+        # Digests of the stores self.grag holds in memory, from the manifest they were loaded with.
+        self._loaded_stores: Dict[str, str] = {}
+        self._reload_lock = threading.Lock()
+        self._next_reload_check = 0.0
+        self.reloads = 0
+        # The graph is built on first use or by warm_up(); importing fast_graphrag alone takes seconds.
+        self._init_lock = threading.Lock()
+        self.warm_up_state = "cold"
+        self.warm_up_error: Optional[str] = None
+        self.warm_up_seconds: Optional[float] = None
 
     def _initialize(self):
-        self.grag = GraphRAG(
-            working_dir=settings.graphrag_working_dir,
+        # Sets the state /ready reports, whether warm_up() or the first query got here first.
+        with self._init_lock:
+            if self.grag is not None:
+                return
+            start = time.perf_counter()
+            try:
+                working_dir, version = self._graph_location()
+                manifest = read_manifest(working_dir)
+                grag = self._build_graph(working_dir)
+                self._load_stores(grag)
+            except Exception as e:
+                self.warm_up_error = str(e)
+                self.warm_up_state = "failed"
+                raise
+            self.grag, self.snapshot_version, self._loaded_stores = grag, version, manifest["stores"]
+            self.warm_up_seconds = time.perf_counter() - start
+            self.warm_up_error = None
+            self.warm_up_state = "ready"
+
+    def _graph_location(self) -> Tuple[str, Optional[str]]:
+        if settings.graphrag_role == "standalone":
+            return settings.graphrag_working_dir, None
+        version = self.snapshots.current_version()
+        return self.snapshots.path_for(version), version
+
+    @staticmethod
+    def _build_graph(working_dir: str):
+        from fast_graphrag import GraphRAG
+
+        config = llm_provider.graphrag_services()
+        if settings.graphrag_storage_backend == "mmap":
+            from .graph_storage import MmapChunkStorage, MmapStateManagerService
+
+            config.update(
+                chunk_storage=MmapChunkStorage(config=None),
+                state_manager_cls=MmapStateManagerService,
+            )
+        options = {"config": GraphRAG.Config(**config)} if config else {}
+
+        return GraphRAG(
+            working_dir=working_dir,
             domain=DOMAIN,
             example_queries=EXAMPLE_QUERIES,
-            entity_types=ENTITY_TYPES
+            entity_types=ENTITY_TYPES,
+            **options
         )
 
+    @staticmethod
+    def _storages(grag) -> Dict[str, Any]:
+        state_manager = grag.state_manager
+        storages = [
+            state_manager.graph_storage,
+            state_manager.entity_storage,
+            state_manager.chunk_storage,
+            state_manager._relationships_to_chunks,
+            state_manager._entities_to_relationships,
+        ]
+        return {storage.namespace.namespace: storage for storage in storages}
+
+    @staticmethod
+    def _load_stores(grag):
+        """Load every store and keep it resident; queries then run without re-reading the disk."""
+        from fast_graphrag._utils import get_event_loop
+
+        get_event_loop().run_until_complete(grag.state_manager.query_start())
+
+    def _load_changed_stores(self, grag, stores: Dict[str, str]) -> List[str]:
+        from fast_graphrag._utils import get_event_loop
+
+        previous, storages = self._storages(self.grag), self._storages(grag)
+        changed = []
+        for namespace, storage in storages.items():
+            if stores.get(namespace) is not None and stores.get(namespace) == self._loaded_stores.get(namespace):
+                # Unchanged: hand the loaded data over; queries only read it.
+                for name, value in vars(previous[namespace]).items():
+                    if name not in ("config", "namespace"):
+                        setattr(storage, name, value)
+            else:
+                changed.append(namespace)
+
+        async def _load():
+            for namespace in changed:
+                await storages[namespace].query_start()
+
+        get_event_loop().run_until_complete(_load())
+        for namespace in changed:
+            storages[namespace].set_in_progress(True)
+        return changed
+
+    def warm_up(self):
+        """Build the graph and load its stores once, so the first query does not pay for it."""
+        if self.grag is not None:
+            return
+        self.warm_up_state = "warming"
+        try:
+            self._initialize()
+        except Exception as e:
+            logger.error(f"GraphRAG warm-up failed: {str(e)}")
+            return
+        logger.info(f"GraphRAG warmed up in {self.warm_up_seconds:.2f}s")
+
+    def readiness(self) -> Dict[str, Any]:
+        return {
+            "state": self.warm_up_state,
+            "error": self.warm_up_error,
+            "warm_up_seconds": self.warm_up_seconds,
+            "snapshot": self.snapshot_version,
+            "reloads": self.reloads,
+        }
+
+    def _sync_graph(self):
+        # Documents are inserted by the ingestion worker process, so watch its manifest on disk.
+        if self.grag is None:
+            return
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + settings.graphrag_reload_poll_seconds
+
+        working_dir, version = self._graph_location()
+        manifest = read_manifest(working_dir)
+        if manifest["stores"] == self._loaded_stores:
+            self.snapshot_version = version
+            return
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        threading.Thread(
+            target=self._reload, args=(working_dir, version, manifest), name="graphrag-reload", daemon=True
+        ).start()
+
+    def _reload(self, working_dir: str, version: Optional[str], manifest: Dict[str, Any]):
+        """Load the stores that changed beside the current graph and swap it in.
+
+        Queries already running keep the graph they started with; the next one picks up the new one.
+        """
+        try:
+            start = time.perf_counter()
+            grag = self._build_graph(working_dir)
+            changed = self._load_changed_stores(grag, manifest["stores"])
+            self.grag, self.snapshot_version, self._loaded_stores = grag, version, manifest["stores"]
+            self.reloads += 1
+            self.answer_cache.clear()
+            logger.info(
+                f"Reloaded knowledge graph stores {', '.join(changed) or '(none)'} from {working_dir} "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+        except Exception as e:
+            logger.error(f"Failed to reload knowledge graph from {working_dir}: {str(e)}")
+        finally:
+            self._reload_lock.release()
+
+    def _embed(self, text: str) -> List[float]:
+        return self.llm.embed([text], EMBEDDING_MODEL)[0]
+
+    def _embed_many(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.asarray(self.llm.embed(texts, EMBEDDING_MODEL), dtype=np.float32)
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
     def _preprocess_message(self, message: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> str:
         if not conversation_history:
             return message
@@ -90,53 +292,506 @@ class GraphRAGService:
 
         Return only the standalone version of the message:"""
 
-        response = self.openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
+        return self.llm.complete(prompt, LLM_MODEL)
+
+    def _retrieve(self, question: str):
+        from fast_graphrag import QueryParam
+        from fast_graphrag._utils import get_event_loop
+
+        # The stores are already resident, so skip GraphRAG.query's per-call load from disk.
+        grag = self.grag
+        response = get_event_loop().run_until_complete(grag.async_query(question, QueryParam(only_context=True)))
+        return response.context
+
+    def _timed_retrieve(self, question: str):
+        start = time.perf_counter()
+        context = self._retrieve(question)
+        return context, time.perf_counter() - start
+
+    def _timed_generate(self, question: str, context) -> Tuple[str, float]:
+        start = time.perf_counter()
+        answer = self._generate(question, context)
+        return answer, time.perf_counter() - start
+
+    def _resolve_question(
+            self,
+            question: str,
+            conversation_history: Optional[List[Dict[str, str]]]
+    ) -> Tuple[str, Optional[_Speculation]]:
+        processed_question = self.query_rewriter.lookup(question, conversation_history)
+        if processed_question is not None:
+            return processed_question, None
+
+        # The rewrite often comes back unchanged, so retrieve on the raw message while we wait for it.
+        future = None
+        if settings.query_rewrite_speculative:
+            future = self._speculative_executor.submit(self._timed_retrieve, question)
+
+        start = time.perf_counter()
+        try:
+            processed_question = self.query_rewriter.rewrite(question, conversation_history)
+        except Exception:
+            if future is not None:
+                future.cancel()
+            raise
+
+        if future is None:
+            return processed_question, None
+        return processed_question, _Speculation(future=future, rewrite_seconds=time.perf_counter() - start)
+
+    def _retrieve_resolved(self, processed_question: str, question: str, speculation: Optional[_Speculation]):
+        if speculation is not None:
+            if same_question(processed_question, question):
+                try:
+                    context, retrieval_seconds = speculation.future.result()
+                    self.query_rewriter.record_speculation(
+                        True, min(speculation.rewrite_seconds, retrieval_seconds)
+                    )
+                    return context
+                except Exception as e:
+                    logger.warning(f"Speculative retrieval failed: {str(e)}")
+            else:
+                speculation.future.cancel()
+                self.query_rewriter.record_speculation(False)
+
+        return self._retrieve(processed_question)
+
+    def _build_answer_prompt(self, question: str, context) -> str:
+        from fast_graphrag import QueryParam
+        from fast_graphrag._prompt import PROMPTS
+        from fast_graphrag._utils import TOKEN_TO_CHAR_RATIO
+
+        params = QueryParam()
+        context_str = context.truncate(
+            max_chars={
+                "entities": params.entities_max_tokens * TOKEN_TO_CHAR_RATIO,
+                "relations": params.relations_max_tokens * TOKEN_TO_CHAR_RATIO,
+                "chunks": params.chunks_max_tokens * TOKEN_TO_CHAR_RATIO,
+            },
+            output_context_str=True
         )
+        return PROMPTS["generate_response_query_no_references"].format(query=question, context=context_str)
+
+    @staticmethod
+    def _has_context(context) -> bool:
+        return bool(context.entities or context.relations or context.chunks)
+
+    @staticmethod
+    def _summarize_context(context) -> Dict[str, Any]:
+        return {
+            "entities": [entity.name for entity, _ in context.entities[:10]],
+            "entity_count": len(context.entities),
+            "relation_count": len(context.relations),
+            "chunk_count": len(context.chunks),
+        }
 
-        return response.choices[0].message.content.strip()
+    def _generate(self, question: str, context) -> str:
+        if not self._has_context(context):
+            return _fail_response()
+
+        return self.llm.complete(self._build_answer_prompt(question, context), LLM_MODEL)
+
+    def _generate_stream(self, question: str, context) -> Iterator[str]:
+        if not self._has_context(context):
+            yield _fail_response()
+            return
+
+        yield from self.llm.stream(self._build_answer_prompt(question, context), LLM_MODEL)
 
     def query(self, question: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> str:
         if not self.grag:
             self._initialize()
 
-        processed_question = self._preprocess_message(question, conversation_history)
-        response = self.grag.query(processed_question)
-        return response.response
+        self._sync_graph()
+        processed_question, speculation = self._resolve_question(question, conversation_history)
+        cache_generation = self.answer_cache.generation
+        if settings.answer_cache_enabled:
+            cached_answer = self.answer_cache.get(processed_question)
+            if cached_answer is not None:
+                if speculation is not None:
+                    speculation.future.cancel()
+                return cached_answer
+
+        context = self._retrieve_resolved(processed_question, question, speculation)
+        answer = self._generate(processed_question, context)
+
+        if settings.answer_cache_enabled:
+            self.answer_cache.put(processed_question, answer, cache_generation)
+        return answer
+
+    def retrieve(
+            self,
+            question: str,
+            conversation_history: Optional[List[Dict[str, str]]] = None,
+            max_chunks: int = 8,
+            max_entities: int = 20,
+            max_relations: int = 20
+    ) -> Dict[str, Any]:
+        """Rank the chunks, entities and relations for a question without generating an answer."""
+        if not self.grag:
+            self._initialize()
+
+        self._sync_graph()
+        start = time.perf_counter()
+        processed_question, speculation = self._resolve_question(question, conversation_history)
+        context = self._retrieve_resolved(processed_question, question, speculation)
 
-    async def query_async(self, question: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> str:
+        chunks = []
+        for chunk, score in context.chunks[:max_chunks]:
+            metadata = chunk.metadata or {}
+            chunks.append({
+                "id": int(chunk.id),
+                "content": chunk.content,
+                "score": float(score),
+                "document_id": metadata.get("document_id"),
+                "section_hash": metadata.get("section_hash"),
+            })
+        return {
+            "question": processed_question,
+            "chunks": chunks,
+            "entities": [
+                {"name": entity.name, "type": entity.type, "description": entity.description, "score": float(score)}
+                for entity, score in context.entities[:max_entities]
+            ],
+            "relations": [
+                {
+                    "source": relation.source,
+                    "target": relation.target,
+                    "description": relation.description,
+                    "score": float(score)
+                }
+                for relation, score in context.relations[:max_relations]
+            ],
+            "retrieval_seconds": time.perf_counter() - start,
+        }
+
+    async def retrieve_async(
+            self,
+            question: str,
+            conversation_history: Optional[List[Dict[str, str]]] = None,
+            user_id: Optional[int] = None,
+            max_chunks: int = 8,
+            max_entities: int = 20,
+            max_relations: int = 20
+    ) -> Dict[str, Any]:
         try:
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor() as executor:
-                result = await loop.run_in_executor(
-                    executor,
-                    self._run_graphrag_query,
-                    question,
-                    conversation_history
-                )
-            return result
+            return await query_scheduler.run(
+                user_id, self.retrieve, question, conversation_history, max_chunks, max_entities, max_relations
+            )
+        except QueryQueueFull:
+            raise
+        except Exception as e:
+            logger.error(f"GraphRAG retrieval failed: {str(e)}")
+            raise
+
+    def _prepare_graph(self):
+        if not self.grag:
+            self._initialize()
+        self._sync_graph()
+
+    def _group_for_retrieval(self, questions: List[str]) -> List[List[int]]:
+        """Indices of questions close enough to share one retrieval; each group's first question leads it."""
+        threshold = settings.batch_share_retrieval_threshold
+        if threshold <= 0 or len(questions) < 2:
+            return [[index] for index in range(len(questions))]
+        try:
+            embeddings = self._embed_many(questions)
+        except Exception as e:
+            logger.warning(f"Embedding batch questions failed, retrieving each separately: {str(e)}")
+            return [[index] for index in range(len(questions))]
+
+        groups: List[List[int]] = []
+        for index, embedding in enumerate(embeddings):
+            for group in groups:
+                if float(embeddings[group[0]] @ embedding) >= threshold:
+                    group.append(index)
+                    break
+            else:
+                groups.append([index])
+        return groups
+
+    async def batch_query_async(
+            self,
+            questions: List[str],
+            user_id: Optional[int] = None,
+            max_parallel: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Answer standalone questions together, yielding each answer as it completes and a summary last.
+
+        Answers carry the positions of the questions they answer; blank questions are skipped.
+        Repeated questions are answered once and cached answers are reused. The rest are grouped by
+        embedding similarity so near-identical questions share one retrieval. Graph work goes through
+        the query scheduler with at most max_parallel calls in flight, and a rejection fails only
+        the questions that needed it.
+        """
+        start = time.perf_counter()
+        parallel = max(1, min(max_parallel or settings.batch_max_parallel, settings.graphrag_max_queued_per_user))
+        limit = asyncio.Semaphore(parallel)
+
+        positions: Dict[str, List[int]] = {}
+        unique: List[str] = []
+        for index, question in enumerate(questions):
+            key = AnswerCache.normalize(question)
+            if not key:
+                continue
+            if key not in positions:
+                positions[key] = []
+                unique.append(question.strip())
+            positions[key].append(index)
+        indices = list(positions.values())
+
+        yield {"type": "batch", "questions": len(questions), "unique": len(unique), "max_parallel": parallel}
+
+        events: asyncio.Queue = asyncio.Queue()
+        totals = {"answered": 0, "cached": 0, "failed": 0, "retrievals": 0, "sequential_seconds": 0.0}
+
+        async def call(fn: Callable[..., Any], *args: Any) -> Any:
+            async with limit:
+                return await query_scheduler.run(user_id, fn, *args)
+
+        async def cache_call(fn: Callable[..., Any], *args: Any) -> Any:
+            # The answer cache is in memory and needs no scheduler slot; only a semantic cache blocks, to embed.
+            if self.answer_cache.semantic_enabled:
+                return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+            return fn(*args)
+
+        def fail(i: int, error: Exception):
+            logger.error(f"Batch question {indices[i]} failed: {str(error)}")
+            totals["failed"] += 1
+            events.put_nowait({
+                "type": "error",
+                "indices": indices[i],
+                "question": unique[i],
+                "content": "I apologize, but I'm unable to answer this question right now."
+            })
+
+        async def lookup(i: int) -> bool:
+            if not settings.answer_cache_enabled:
+                return False
+            try:
+                cached_answer = await cache_call(self.answer_cache.get, unique[i])
+            except Exception as e:
+                logger.warning(f"Answer cache lookup for batch question {indices[i]} failed: {str(e)}")
+                return False
+            if cached_answer is None:
+                return False
+            totals["cached"] += 1
+            events.put_nowait({
+                "type": "answer", "indices": indices[i], "question": unique[i], "answer": cached_answer,
+                "cached": True, "shared_retrieval": False, "seconds": 0.0
+            })
+            return True
+
+        async def answer_group(group: List[int], cache_generation: int):
+            try:
+                context, retrieval_seconds = await call(self._timed_retrieve, unique[group[0]])
+            except Exception as e:
+                for i in group:
+                    fail(i, e)
+                return
+            totals["retrievals"] += 1
+
+            async def answer(i: int):
+                try:
+                    answer_text, generation_seconds = await call(self._timed_generate, unique[i], context)
+                except Exception as e:
+                    fail(i, e)
+                    return
+                if settings.answer_cache_enabled:
+                    try:
+                        await cache_call(self.answer_cache.put, unique[i], answer_text, cache_generation)
+                    except Exception as e:
+                        logger.warning(f"Caching the answer to batch question {indices[i]} failed: {str(e)}")
+                # Asked one at a time, every question would have paid for its own retrieval.
+                seconds = retrieval_seconds + generation_seconds
+                totals["answered"] += 1
+                totals["sequential_seconds"] += seconds
+                events.put_nowait({
+                    "type": "answer", "indices": indices[i], "question": unique[i], "answer": answer_text,
+                    "cached": False, "shared_retrieval": len(group) > 1, "seconds": seconds
+                })
+
+            await asyncio.gather(*(answer(i) for i in group))
+
+        async def run():
+            try:
+                await call(self._prepare_graph)
+            except Exception as e:
+                for i in range(len(unique)):
+                    fail(i, e)
+                return
+            cache_generation = self.answer_cache.generation
+            cached = await asyncio.gather(*(lookup(i) for i in range(len(unique))))
+            remaining = [i for i, hit in enumerate(cached) if not hit]
+            try:
+                groups = await call(self._group_for_retrieval, [unique[i] for i in remaining]) if remaining else []
+            except QueryQueueFull:
+                logger.warning("Grouping batch questions was rejected by the query scheduler, retrieving each separately")
+                groups = [[index] for index in range(len(remaining))]
+            await asyncio.gather(*(
+                answer_group([remaining[i] for i in group], cache_generation) for group in groups
+            ))
+
+        finished = object()
+        task = asyncio.ensure_future(run())
+        task.add_done_callback(lambda _: events.put_nowait(finished))
+        try:
+            while True:
+                event = await events.get()
+                if event is finished:
+                    break
+                yield event
+            if task.exception() is not None:
+                logger.error(f"Batch query failed: {str(task.exception())}")
+                yield {"type": "error", "content": "The batch could not be completed. Please try again later."}
+        finally:
+            task.cancel()
+
+        wall_seconds = time.perf_counter() - start
+        yield {
+            "type": "summary",
+            "questions": len(questions),
+            "unique": len(unique),
+            "answered": totals["answered"],
+            "cached": totals["cached"],
+            "failed": totals["failed"],
+            "retrievals": totals["retrievals"],
+            "wall_seconds": wall_seconds,
+            "sequential_seconds": totals["sequential_seconds"],
+            "speedup": totals["sequential_seconds"] / wall_seconds if wall_seconds > 0 else None,
+        }
+
+    async def query_async(
+            self,
+            question: str,
+            conversation_history: Optional[List[Dict[str, str]]] = None,
+            user_id: Optional[int] = None
+    ) -> str:
+        try:
+            return await query_scheduler.run(user_id, self._run_graphrag_query, question, conversation_history)
+        except QueryQueueFull:
+            raise
         except Exception as e:
             logger.error(f"Error in GraphRAG query: {str(e)}")
             return f"I apologize, but I encountered an error while processing your question. Please try again."
 
     def _run_graphrag_query(self, question: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> str:
+        try:
+            return self.query(question, conversation_history)
+        except Exception as e:
+            logger.error(f"GraphRAG query failed: {str(e)}")
+            return "I apologize, but I'm unable to process your request at the moment. Please try again later."
+
+    def stream_query(self, question: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Iterator[Dict[str, Any]]:
+        answer_parts = []
+        cached = False
         try:
             if not self.grag:
                 self._initialize()
 
-            processed_question = self._preprocess_message(question, conversation_history)
-            response = self.grag.query(processed_question)
-            return response.response
+            self._sync_graph()
+            processed_question, speculation = self._resolve_question(question, conversation_history)
+            yield {"type": "question", "question": processed_question}
+
+            cache_generation = self.answer_cache.generation
+            cached_answer = self.answer_cache.get(processed_question) if settings.answer_cache_enabled else None
+            if cached_answer is not None:
+                if speculation is not None:
+                    speculation.future.cancel()
+                cached = True
+                answer_parts.append(cached_answer)
+                yield {"type": "token", "content": cached_answer}
+            else:
+                context = self._retrieve_resolved(processed_question, question, speculation)
+                yield {"type": "context", "context": self._summarize_context(context)}
+
+                for token in self._generate_stream(processed_question, context):
+                    answer_parts.append(token)
+                    yield {"type": "token", "content": token}
+
+                if settings.answer_cache_enabled:
+                    self.answer_cache.put(processed_question, "".join(answer_parts).strip(), cache_generation)
         except Exception as e:
-            logger.error(f"GraphRAG query failed: {str(e)}")
-            return "I apologize, but I'm unable to process your request at the moment. Please try again later."
+            logger.error(f"GraphRAG streaming query failed: {str(e)}")
+            answer_parts = ["I apologize, but I'm unable to process your request at the moment. Please try again later."]
+            yield {"type": "error", "content": answer_parts[0]}
+
+        yield {"type": "done", "response": "".join(answer_parts).strip(), "cached": cached}
+
+    async def stream_query_async(
+            self,
+            question: str,
+            conversation_history: Optional[List[Dict[str, str]]] = None,
+            user_id: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        try:
+            async for event in query_scheduler.iterate(user_id, self.stream_query, question, conversation_history):
+                yield event
+        except QueryQueueFull:
+            yield {"type": "error", "content": "The assistant is busy right now. Please try again in a moment."}
 
     def add_document(self, content: str):
-        if not self.grag:
-            self._initialize()
-        self.grag.insert(content)
+        self.add_documents([content])
+
+    def add_documents(self, contents: List[str], metadata: Optional[List[dict]] = None):
+        if not contents:
+            return
+        self._write_graph(lambda grag: grag.insert(contents, metadata=metadata))
+
+    def remove_sections(self, section_hashes: Iterable[str]) -> PruneResult:
+        """Delete the chunks inserted for these sections, with the relationships and entities they orphan.
+
+        Chunks inserted without a section_hash in their metadata cannot be matched and stay in the graph.
+        """
+        section_hashes = set(section_hashes)
+        if not section_hashes:
+            return PruneResult()
+        return self._write_graph(
+            lambda grag: self._prune(grag, lambda chunk: (chunk.metadata or {}).get("section_hash") in section_hashes)
+        )
+
+    def compact(self, referenced_sections: Optional[Set[str]] = None) -> PruneResult:
+        """Rewrite the graph without orphaned relationships and entities.
+
+        With referenced_sections, chunks of any other section are dropped first, which catches
+        documents deleted before removals were tracked.
+        """
+        def drop_chunk(chunk) -> bool:
+            section_hash = (chunk.metadata or {}).get("section_hash")
+            return referenced_sections is not None and section_hash is not None and section_hash not in referenced_sections
+
+        return self._write_graph(lambda grag: self._prune(grag, drop_chunk))
+
+    def _write_graph(self, update: Callable[[Any], Any]) -> Any:
+        if settings.graphrag_role == "reader":
+            raise RuntimeError("This process serves a read-only snapshot; documents are added by the writer")
+        if settings.graphrag_role == "writer":
+            with self.snapshots.publish() as staging_dir:
+                result = update(self._build_graph(staging_dir))
+        else:
+            # Write through a separate instance so the resident graph keeps serving until the reload.
+            result = update(self._build_graph(settings.graphrag_working_dir))
+            write_manifest(settings.graphrag_working_dir, str(time.time_ns()))
+
+        if self.grag is not None:
+            working_dir, version = self._graph_location()
+            self._reload_lock.acquire()
+            self._reload(working_dir, version, read_manifest(working_dir))
+        return result
+
+    @staticmethod
+    def _prune(grag, drop_chunk: Callable[[Any], bool]) -> PruneResult:
+        from fast_graphrag._utils import get_event_loop
+
+        state_manager = grag.state_manager
+
+        async def _run() -> PruneResult:
+            await state_manager.insert_start()
+            result = await prune(state_manager, drop_chunk)
+            # Rebuilds map_r2c and map_e2r from what is left and saves every store.
+            await state_manager.insert_done()
+            return result
 
+        return get_event_loop().run_until_complete(_run())
 
 graphrag_service = GraphRAGService()
\ No newline at end of file
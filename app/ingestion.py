@@ -0,0 +1,327 @@
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, and_, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import ObjectDeletedError, StaleDataError
+
+from app.chunking import content_hash, split_sections
+from app.config import settings
+from app.database import SessionLocal
+from app.extraction import extract_file_text
+from app.models import Document, DocumentChunk, GraphRemoval, IngestionJob
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_EXTRACTING = "extracting"
+JOB_INSERTING = "inserting"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+ACTIVE_STATUSES = (JOB_EXTRACTING, JOB_INSERTING)
+
+
+def build_document_content(document: Document, text_content: str) -> str:
+    return f"""
+DOCUMENT METADATA:
+- Filename: {document.filename}
+- Uploaded: {document.uploaded_at}
+- File Size: {document.file_size} bytes
+
+DOCUMENT CONTENT:
+{text_content}
+"""
+
+
+def plan_sections(db: Session, extracted: List[Tuple[IngestionJob, str]]):
+    """Split each document into sections and keep only the ones not already in the graph.
+
+    Returns the contents to insert with their metadata, and the section hashes of every document.
+    """
+    sections_by_job = {job.id: split_sections(text, settings.chunk_max_chars) for job, text in extracted}
+    hashes_by_job = {
+        job_id: [content_hash(section) for section in sections]
+        for job_id, sections in sections_by_job.items()
+    }
+
+    all_hashes = {section_hash for hashes in hashes_by_job.values() for section_hash in hashes}
+    indexed = set()
+    if all_hashes:
+        indexed = {
+            row.content_hash for row in db.query(DocumentChunk.content_hash).join(Document).filter(
+                Document.processed == True,
+                DocumentChunk.content_hash.in_(all_hashes)
+            ).distinct()
+        }
+
+    contents, metadata = [], []
+    for job, text in extracted:
+        document = job.document
+        duplicate = db.query(Document.id).filter(
+            Document.text_hash == document.text_hash,
+            Document.processed == True,
+            Document.id != document.id
+        ).first()
+        if duplicate:
+            logger.info(f"Document {document.id} has the same text as document {duplicate.id}, skipping insert")
+            indexed.update(hashes_by_job[job.id])
+            continue
+
+        new_sections = 0
+        for section, section_hash in zip(sections_by_job[job.id], hashes_by_job[job.id]):
+            if section_hash in indexed:
+                continue
+            indexed.add(section_hash)
+            contents.append(build_document_content(document, section))
+            metadata.append({"document_id": document.id, "section_hash": section_hash})
+            new_sections += 1
+        logger.info(
+            f"Document {document.id}: {new_sections} new of {len(hashes_by_job[job.id])} sections"
+        )
+
+    return contents, metadata, hashes_by_job
+
+
+def enqueue_document(db: Session, document: Document, reprocess: bool = False) -> IngestionJob:
+    """Queue the document, or re-queue a failed job; with reprocess, a finished one too.
+
+    Re-processing plans the sections again: only new ones are inserted and those the document no
+    longer has are queued for removal from the graph.
+    """
+    job = db.query(IngestionJob).filter(IngestionJob.document_id == document.id).first()
+    if job is None:
+        job = IngestionJob(
+            document_id=document.id,
+            status=JOB_QUEUED,
+            max_attempts=settings.ingestion_max_attempts
+        )
+        db.add(job)
+    elif job.status == JOB_FAILED or (reprocess and job.status == JOB_DONE):
+        job.status = JOB_QUEUED
+        job.progress = 0
+        job.attempts = 0
+        job.error = None
+        job.available_at = datetime.utcnow()
+        job.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def job_is_running(job: IngestionJob) -> bool:
+    """True while a worker holds the job; once its lease goes stale the worker is presumed dead."""
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.ingestion_job_stale_seconds)
+    return job.status in ACTIVE_STATUSES and job.updated_at >= stale_before
+
+
+def claim_jobs(db: Session, limit: int = 1) -> List[IngestionJob]:
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=settings.ingestion_job_stale_seconds)
+    jobs = db.query(IngestionJob).filter(
+        or_(
+            and_(IngestionJob.status == JOB_QUEUED, IngestionJob.available_at <= now),
+            # Jobs whose worker died mid-run are picked up again once their lease goes stale.
+            and_(IngestionJob.status.in_(ACTIVE_STATUSES), IngestionJob.updated_at < stale_before)
+        )
+    ).order_by(IngestionJob.available_at, IngestionJob.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    if not jobs:
+        db.rollback()
+        return []
+
+    for job in jobs:
+        job.attempts += 1
+        job.status = JOB_EXTRACTING
+        job.progress = 5
+        job.updated_at = now
+    db.commit()
+    return jobs
+
+
+def _download_and_extract(filename: str, s3_key: str, file_hash: Optional[str]) -> str:
+    from app.s3_service import s3_service
+
+    with tempfile.NamedTemporaryFile(suffix=os.path.splitext(filename)[1]) as download:
+        if not s3_service.download_to_file(s3_key, download, file_hash):
+            raise ValueError("Failed to download file from S3")
+        download.flush()
+        return extract_file_text(filename, download.name)
+
+
+def run_jobs(db: Session, jobs: List[IngestionJob]):
+    from app.graphrag_service import graphrag_service
+
+    extracted = []
+    with ThreadPoolExecutor(max_workers=settings.ingestion_extract_workers) as executor:
+        futures = {}
+        for job in jobs:
+            try:
+                document = job.document
+            except ObjectDeletedError:
+                # Deleted since it was claimed; _fail below notices and leaves it alone.
+                continue
+            if document is not None:
+                futures[job.id] = executor.submit(
+                    _download_and_extract, document.filename, document.s3_key, document.content_hash
+                )
+        for job in jobs:
+            try:
+                if job.id not in futures:
+                    raise ValueError("Document no longer exists")
+                text_content = futures[job.id].result()
+                job.document.text_hash = content_hash(text_content)
+            except Exception as e:
+                _fail(db, job, e)
+                continue
+            if _set_status(db, job, JOB_INSERTING, 50):
+                extracted.append((job, text_content))
+
+    from app.s3_service import s3_service
+    if s3_service.cache is not None:
+        logger.info(f"Blob cache: {s3_service.cache.stats()}")
+        try:
+            s3_service.cache.publish_stats()
+        except OSError as e:
+            logger.warning(f"Could not publish blob cache stats: {str(e)}")
+
+    if not extracted:
+        return
+
+    # One insert for the whole batch: a single extraction pass and a single save of the graph stores.
+    try:
+        contents, metadata, hashes_by_job = plan_sections(db, extracted)
+        graphrag_service.add_documents(contents, metadata)
+    except Exception as e:
+        for job, _ in extracted:
+            _fail(db, job, e)
+        return
+
+    for job, _ in extracted:
+        job_id = _job_id(job)
+        try:
+            previous = {
+                row.content_hash for row in
+                db.query(DocumentChunk.content_hash).filter(DocumentChunk.document_id == job.document_id)
+            }
+            # Sections this version no longer has; run_removals drops them unless another document does.
+            db.add_all(
+                GraphRemoval(section_hash=section_hash, document_id=job.document_id)
+                for section_hash in previous - set(hashes_by_job[job_id])
+            )
+            db.query(DocumentChunk).filter(DocumentChunk.document_id == job.document_id).delete()
+            db.add_all(
+                DocumentChunk(document_id=job.document_id, content_hash=section_hash, position=position)
+                for position, section_hash in enumerate(hashes_by_job[job_id])
+            )
+            job.document.processed = True
+            job.finished_at = datetime.utcnow()
+            job.error = None
+        except (ObjectDeletedError, StaleDataError):
+            db.rollback()
+            logger.warning(f"Ingestion job {job_id} was deleted while it ran, skipping it")
+            continue
+        _set_status(db, job, JOB_DONE, 100)
+
+
+def run_removals(db: Session) -> int:
+    """Remove queued sections from the graph, keeping any that a document still references."""
+    from app.graphrag_service import graphrag_service
+
+    removals = db.query(GraphRemoval).order_by(GraphRemoval.id).limit(
+        settings.graph_removal_batch_size
+    ).with_for_update(skip_locked=True).all()
+    if not removals:
+        db.rollback()
+        return 0
+
+    queued = {removal.section_hash for removal in removals}
+    referenced = {
+        row.content_hash for row in
+        db.query(DocumentChunk.content_hash).filter(DocumentChunk.content_hash.in_(queued)).distinct()
+    }
+    orphaned = queued - referenced
+    try:
+        result = graphrag_service.remove_sections(orphaned)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Removing {len(orphaned)} sections from the knowledge graph failed: {str(e)}")
+        return 0
+
+    for removal in removals:
+        db.delete(removal)
+    db.commit()
+    logger.info(
+        f"Removed {len(orphaned)} of {len(queued)} queued sections from the knowledge graph: {result.chunks} chunks, "
+        f"{result.relationships} relationships, {result.entities} entities"
+    )
+    return len(removals)
+
+
+def run_worker(poll_interval: float = None, once: bool = False):
+    poll_interval = poll_interval or settings.ingestion_poll_seconds
+    logger.info("Ingestion worker started")
+    while True:
+        jobs, removed = [], 0
+        db = SessionLocal()
+        try:
+            removed = run_removals(db)
+            jobs = claim_jobs(db, settings.ingestion_batch_size)
+            if jobs:
+                logger.info(f"Processing ingestion jobs {[job.id for job in jobs]}")
+                run_jobs(db, jobs)
+        except Exception:
+            # A lost connection or a row changed underneath must not stop ingestion for everyone; jobs
+            # left mid-run are claimed again once their lease goes stale.
+            logger.exception("Ingestion worker iteration failed")
+            db.rollback()
+            jobs, removed = [], 0
+        finally:
+            db.close()
+
+        if once:
+            return
+        if not jobs and not removed:
+            time.sleep(poll_interval)
+
+
+def _job_id(job: IngestionJob) -> int:
+    # From the identity map, so it is available even after the row was deleted underneath us.
+    return inspect(job).identity[0]
+
+
+def _fail(db: Session, job: IngestionJob, error: Exception):
+    db.rollback()
+    try:
+        logger.error(f"Ingestion job {job.id} failed (attempt {job.attempts}): {str(error)}")
+        job.error = str(error)
+        if job.attempts < job.max_attempts:
+            job.available_at = datetime.utcnow() + timedelta(
+                seconds=settings.ingestion_retry_backoff_seconds * 2 ** (job.attempts - 1)
+            )
+            _set_status(db, job, JOB_QUEUED, 0)
+        else:
+            job.finished_at = datetime.utcnow()
+            _set_status(db, job, JOB_FAILED, job.progress)
+    except ObjectDeletedError:
+        db.rollback()
+        logger.warning(f"Ingestion job {_job_id(job)} was deleted while it ran: {str(error)}")
+
+
+def _set_status(db: Session, job: IngestionJob, status: str, progress: int) -> bool:
+    """Record the job's progress; False when its row has been deleted since it was claimed."""
+    try:
+        job.status = status
+        job.progress = progress
+        job.updated_at = datetime.utcnow()
+        db.commit()
+    except (ObjectDeletedError, StaleDataError):
+        db.rollback()
+        logger.warning(f"Ingestion job {_job_id(job)} was deleted while it ran, dropping its {status} update")
+        return False
+    return True
\ No newline at end of file
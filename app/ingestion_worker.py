@@ -0,0 +1,18 @@
+import argparse
+import logging
+
+from app.ingestion import run_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Process queued document ingestion jobs")
+    parser.add_argument("--once", action="store_true", help="Run one pass (pending graph removals, then up to one batch of jobs) and exit")
+    parser.add_argument("--poll-interval", type=float, default=None, help="Seconds to wait when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    run_worker(poll_interval=args.poll_interval, once=args.once)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
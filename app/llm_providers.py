@@ -0,0 +1,223 @@
+import hashlib
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+# fast_graphrag stores entity vectors in files named by dimension, so the fake matches OpenAI's.
+EMBEDDING_DIM = 1536
+
+WORD_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9'&.-]*")
+NAME_PATTERN = re.compile(r"\b[A-Z][A-Za-z0-9&'-]*(?:\s+(?:of\s+|for\s+|and\s+)?[A-Z][A-Za-z0-9&'-]*)*")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+# Capitalised words that start sentences or label the document header rather than name anything.
+NOT_NAMES = {
+    "A", "An", "And", "As", "At", "But", "By", "For", "From", "He", "Her", "His", "How", "If", "In", "It",
+    "Its", "Of", "On", "Or", "Our", "She", "So", "The", "Their", "There", "These", "They", "This", "To",
+    "We", "What", "When", "Where", "Which", "Who", "Why", "With", "DOCUMENT", "METADATA", "CONTENT",
+    "Filename", "Uploaded", "File Size",
+}
+
+
+class LLMProvider(ABC):
+    """Where GraphRAGService and fast_graphrag send completions and embeddings."""
+
+    @abstractmethod
+    def complete(self, prompt: str, model: str, temperature: float = 0) -> str:
+        ...
+
+    @abstractmethod
+    def stream(self, prompt: str, model: str, temperature: float = 0) -> Iterator[str]:
+        ...
+
+    @abstractmethod
+    def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        ...
+
+    def graphrag_services(self) -> Dict[str, Any]:
+        """GraphRAG.Config fields that route fast_graphrag's own calls; empty keeps its defaults."""
+        return {}
+
+
+class OpenAIProvider(LLMProvider):
+    def __init__(self, api_key: str):
+        import openai
+
+        self.client = openai.OpenAI(api_key=api_key)
+
+    def complete(self, prompt: str, model: str, temperature: float = 0) -> str:
+        response = self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature
+        )
+        return response.choices[0].message.content.strip()
+
+    def stream(self, prompt: str, model: str, temperature: float = 0) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            stream=True
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        response = self.client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in response.data]
+
+
+def _stable_hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _words(text: str) -> List[str]:
+    return [word.lower().strip(".'-") for word in WORD_PATTERN.findall(text)]
+
+
+def _between(text: str, start: str, end: str) -> str:
+    begin = text.find(start)
+    if begin < 0:
+        return ""
+    begin += len(start)
+    stop = text.find(end, begin)
+    return text[begin:stop if stop >= 0 else len(text)].strip()
+
+
+class FakeProvider(LLMProvider):
+    """Deterministic local stand-in for benchmarks and offline runs; nothing leaves the process.
+
+    Completions are templated from the prompt: query rewrites return the message unchanged and
+    answers quote the context sentences that share the most words with the question. Embeddings
+    hash words and word pairs into fixed buckets, so texts that share words land close together.
+    Each call sleeps for the configured latency plus a jitter drawn from the prompt's hash, so the
+    same run takes the same time every time.
+    """
+
+    def __init__(self, latency: float, jitter: float, embedding_latency: float, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.embedding_latency = embedding_latency
+        self.seed = seed
+
+    def delay_for(self, key: str, latency: float) -> float:
+        if latency <= 0 and self.jitter <= 0:
+            return 0.0
+        unit = _stable_hash(f"{self.seed}:{key}") / 2 ** 64
+        return max(0.0, latency + self.jitter * (2 * unit - 1))
+
+    def complete(self, prompt: str, model: str, temperature: float = 0) -> str:
+        time.sleep(self.delay_for(prompt, self.latency))
+        return self.respond(prompt)
+
+    def stream(self, prompt: str, model: str, temperature: float = 0) -> Iterator[str]:
+        time.sleep(self.delay_for(prompt, self.latency))
+        words = self.respond(prompt).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == 0 else f" {word}"
+
+    def embed(self, texts: List[str], model: str) -> List[List[float]]:
+        time.sleep(self.delay_for("\n".join(texts), self.embedding_latency))
+        return self.embed_now(texts).tolist()
+
+    def embed_now(self, texts: List[str]) -> np.ndarray:
+        embeddings = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = _words(text)
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                h = _stable_hash(f"{self.seed}:{feature}")
+                embeddings[row, h % EMBEDDING_DIM] += 1.0 if (h >> 32) & 1 else -1.0
+            if not words:
+                embeddings[row, _stable_hash(f"{self.seed}:{text}") % EMBEDDING_DIM] = 1.0
+        return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+    def graphrag_services(self) -> Dict[str, Any]:
+        from app.fake_graphrag_services import FakeEmbeddingService, FakeLLMService
+
+        return {
+            "llm_service": FakeLLMService(model="fake", provider=self),
+            "embedding_service": FakeEmbeddingService(embedding_dim=EMBEDDING_DIM, model="fake", provider=self),
+        }
+
+    def respond(self, prompt: str) -> str:
+        if "Current Message:" in prompt:
+            return _between(prompt, "Current Message:", "\n")
+        if "# USER QUERY" in prompt:
+            return self.answer(_between(prompt, "# USER QUERY", "# INSTRUCTIONS"), _between(prompt, "# INPUT DATA", "# USER QUERY"))
+        return f"Simulated response {_stable_hash(prompt) % 10 ** 8:08d}."
+
+    @staticmethod
+    def answer(query: str, context: str) -> str:
+        terms = set(_words(query))
+        sentences = [sentence.strip() for sentence in SENTENCE_PATTERN.split(context) if len(sentence.strip()) > 20]
+        scored = sorted(
+            ((len(terms & set(_words(sentence))), position) for position, sentence in enumerate(sentences)),
+            key=lambda item: (-item[0], item[1])
+        )
+        picked = [sentences[position] for overlap, position in scored[:3] if overlap]
+        if not picked:
+            return "The documents do not contain enough information to answer this question."
+        return " ".join(picked)
+
+    @staticmethod
+    def summarize(description: str) -> str:
+        sentences = list(dict.fromkeys(sentence.strip() for sentence in SENTENCE_PATTERN.split(description) if sentence.strip()))
+        return " ".join(sentences[:3])
+
+    @staticmethod
+    def names(text: str) -> List[str]:
+        names = []
+        for match in NAME_PATTERN.finditer(text):
+            name = match.group(0).strip()
+            if name not in NOT_NAMES and len(name) > 2:
+                names.append(name)
+        return names
+
+    def query_entities(self, query: str) -> Tuple[List[str], List[str]]:
+        named = list(dict.fromkeys(self.names(query)))
+        named_words = set(_words(" ".join(named)))
+        generic = [word for word in dict.fromkeys(_words(query)) if len(word) > 4 and word not in named_words]
+        return named, generic
+
+    def extract_graph(self, text: str, entity_types: List[str]) -> Dict[str, Any]:
+        """Entities are the capitalised names in the text; names sharing a sentence are related."""
+        sentences = [sentence.strip() for sentence in SENTENCE_PATTERN.split(text) if sentence.strip()]
+        counts = Counter(name for sentence in sentences for name in self.names(sentence))
+        kept = {name for name, _ in counts.most_common(settings.fake_llm_max_entities)}
+
+        entities, relationships, seen_pairs = {}, [], set()
+        for sentence in sentences:
+            in_sentence = [name for name in dict.fromkeys(self.names(sentence)) if name in kept]
+            for name in in_sentence:
+                if name not in entities:
+                    entity_type = entity_types[_stable_hash(name) % len(entity_types)] if entity_types else "Organization"
+                    entities[name] = {"name": name, "type": entity_type, "desc": sentence[:300]}
+            for source, target in zip(in_sentence, in_sentence[1:]):
+                if (source, target) not in seen_pairs:
+                    seen_pairs.add((source, target))
+                    relationships.append({"source": source, "target": target, "desc": sentence[:300]})
+
+        return {"entities": list(entities.values()), "relationships": relationships, "other_relationships": []}
+
+
+def create_provider() -> LLMProvider:
+    if settings.llm_provider == "fake":
+        return FakeProvider(
+            latency=settings.fake_llm_latency_seconds,
+            jitter=settings.fake_llm_jitter_seconds,
+            embedding_latency=settings.fake_embedding_latency_seconds,
+            seed=settings.fake_llm_seed
+        )
+    if settings.llm_provider != "openai":
+        raise ValueError(f"Unknown LLM provider '{settings.llm_provider}'")
+    return OpenAIProvider(settings.openai_api_key)
+
+
+llm_provider = create_provider()
\ No newline at end of file
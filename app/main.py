@@ -1,18 +1,38 @@
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+import threading
+import time
 
-from app.database import get_db, engine
+from app.database import get_async_db, engine, async_engine
 from app.models import Base
 from app.routers import auth, chat, admin, documents
 from app.config import settings
+from app.graphrag_service import graphrag_service
+from app.pagination import NEXT_CURSOR_HEADER
+from app.query_scheduler import QueryQueueFull
+from app.password_pool import PasswordPoolFull
 from dotenv import load_dotenv
 
 load_dotenv()
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="NSF AI Assistant", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(Base.metadata.create_all, bind=engine)
+    if settings.graphrag_warm_up:
+        # Serve requests straight away; /ready reports when the knowledge graph is loaded.
+        threading.Thread(target=graphrag_service.warm_up, name="graphrag-warm-up", daemon=True).start()
+    yield
+    await async_engine.dispose()
+
+
+app = FastAPI(title="NSF AI Assistant", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,10 +40,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 security = HTTPBearer()
 
+
+@app.exception_handler(QueryQueueFull)
+async def query_queue_full_handler(request: Request, exc: QueryQueueFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "The assistant is busy right now. Please try again shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.exception_handler(PasswordPoolFull)
+async def password_pool_full_handler(request: Request, exc: PasswordPoolFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many sign-in attempts right now. Please try again shortly."},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
@@ -35,6 +74,33 @@ async def root():
     return {"message": "NSF AI Assistant API", "status": "running"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    graphrag = graphrag_service.readiness()
+    ready = graphrag["state"] == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "graphrag": graphrag}
+    )
+
+
 @app.get("/health")
-async def health_check(db: Session = Depends(get_db)):
-    return {"status": "healthy", "database": "connected"}
+async def health_check(detail: bool = False, db: AsyncSession = Depends(get_async_db)):
+    start = time.perf_counter()
+    try:
+        await db.execute(text("SELECT 1"))
+    except Exception as e:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "database": "unreachable", "error": str(e)}
+        )
+    round_trip_ms = (time.perf_counter() - start) * 1000
+
+    result = {"status": "healthy", "database": "connected"}
+    if detail:
+        result["database_round_trip_ms"] = round(round_trip_ms, 3)
+        result["pools"] = {
+            "sync": engine.pool.stats(),
+            "async": async_engine.pool.stats()
+        }
+    return result
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -21,11 +21,18 @@ class User(Base):
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        Index("ix_conversations_user_id_created_at", "user_id", "created_at"),
+        Index("ix_conversations_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     title = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Maintained by the chat router in the same transaction as each message insert.
+    message_count = Column(Integer, default=0, nullable=False)
+    last_message_at = Column(DateTime)
 
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation")
@@ -33,6 +40,9 @@ class Conversation(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_conversation_id_timestamp", "conversation_id", "timestamp"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"))
@@ -53,4 +63,46 @@ class Document(Base):
     uploaded_by = Column(Integer, ForeignKey("users.id"))
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     file_size = Column(Integer)
-    content_type = Column(String)
\ No newline at end of file
+    content_type = Column(String)
+    content_hash = Column(String(64), unique=True, index=True)
+    text_hash = Column(String(64), index=True)
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), unique=True, nullable=False)
+    status = Column(String, default="queued", index=True, nullable=False)
+    progress = Column(Integer, default=0)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    error = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    available_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    document = relationship("Document")
+
+
+class DocumentChunk(Base):
+    __tablename__ = "document_chunks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("documents.id", ondelete="CASCADE"), index=True, nullable=False)
+    content_hash = Column(String(64), index=True, nullable=False)
+    position = Column(Integer, nullable=False)
+
+    document = relationship("Document")
+
+
+class GraphRemoval(Base):
+    """A section whose chunks should leave the knowledge graph once no document references it."""
+    __tablename__ = "graph_removals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    section_hash = Column(String(64), index=True, nullable=False)
+    # Not a foreign key: the document is usually gone by the time the worker gets here.
+    document_id = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
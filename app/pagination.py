@@ -0,0 +1,58 @@
+import base64
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import or_, and_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    raw = "|".join(value.isoformat() if isinstance(value, datetime) else str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[str, ...]:
+    try:
+        return tuple(base64.urlsafe_b64decode(cursor.encode()).decode().split("|"))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def after_timestamp_cursor(query, timestamp_column, id_column, cursor: Optional[str]):
+    """Keyset filter for listings ordered by (timestamp desc, id desc)."""
+    if not cursor:
+        return query
+    try:
+        timestamp, row_id = decode_cursor(cursor)
+        timestamp, row_id = datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return query.filter(or_(
+        timestamp_column < timestamp,
+        and_(timestamp_column == timestamp, id_column < row_id)
+    ))
+
+
+def after_id_cursor(query, id_column, cursor: Optional[str]):
+    """Keyset filter for listings ordered by id ascending."""
+    if not cursor:
+        return query
+    try:
+        (row_id,) = decode_cursor(cursor)
+        row_id = int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return query.filter(id_column > row_id)
+
+
+def set_next_cursor(response: Response, rows: list, limit: int, cursor_key: Callable[..., tuple]) -> list:
+    """Trim the look-ahead row fetched past the limit and expose the next page's cursor in a header."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*cursor_key(rows[-1]))
+    return rows
\ No newline at end of file
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from app.config import settings
+
+
+class PasswordPoolFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class PasswordPool:
+    """Runs bcrypt on its own small thread pool so a login burst cannot take the request threads.
+
+    bcrypt releases the GIL, so each worker hashes in parallel. Work beyond the workers waits in
+    a bounded queue and anything past that is rejected instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_queued: int, retry_after_seconds: int):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.workers = workers
+        self.max_queued = max_queued
+        self.retry_after_seconds = retry_after_seconds
+
+        # _pending and rejected only change on the event loop; the totals come from the pool threads.
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._total_wait = 0.0
+        self._total_run = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.workers + self.max_queued:
+            self.rejected += 1
+            raise PasswordPoolFull(self.retry_after_seconds)
+
+        self._pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self._timed, submitted, fn, *args)
+        finally:
+            self._pending -= 1
+
+    def _timed(self, submitted: float, fn: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self._total_wait += started - submitted
+                self._total_run += finished - started
+                self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            completed, total_wait, total_run = self.completed, self._total_wait, self._total_run
+        return {
+            "workers": self.workers,
+            "pending": self._pending,
+            "max_queued": self.max_queued,
+            "completed": completed,
+            "rejected": self.rejected,
+            "avg_queue_ms": total_wait / completed * 1000 if completed else 0.0,
+            "avg_hash_ms": total_run / completed * 1000 if completed else 0.0,
+        }
+
+
+password_pool = PasswordPool(
+    workers=settings.password_hash_workers,
+    max_queued=settings.password_hash_max_queued,
+    retry_after_seconds=settings.password_hash_retry_after_seconds
+)
\ No newline at end of file
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    role: str
+    is_active: bool
+
+
+@dataclass
+class _CacheEntry:
+    principal: Principal
+    created_at: float
+
+
+class PrincipalCache:
+    """Authenticated users keyed by token subject, so most requests skip the users table.
+
+    Entries live for ttl_seconds. invalidate() drops a subject at once in this process; other
+    workers pick up the change when their entry expires. With trust_token_claims a token vouches for
+    itself only during its first ttl_seconds, after which it goes through the cache and the users
+    table like any other, so other workers also stop honouring a deleted user's tokens within
+    ttl_seconds rather than when the token expires.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, trust_token_claims: bool, revocation_ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.trust_token_claims = trust_token_claims
+        self.revocation_ttl_seconds = revocation_ttl_seconds
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._revoked_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.claim_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, claims: Dict[str, Any]) -> Optional[Principal]:
+        subject = claims["sub"]
+        with self._lock:
+            if self.trust_token_claims and self._claims_usable(claims):
+                self.claim_hits += 1
+                return Principal(id=claims["uid"], email=subject, role=claims["role"], is_active=True)
+
+            entry = self._entries.get(subject)
+            if entry is not None and time.monotonic() - entry.created_at <= self.ttl_seconds:
+                self._entries.move_to_end(subject)
+                self.hits += 1
+                return entry.principal
+            if entry is not None:
+                del self._entries[subject]
+
+            self.misses += 1
+            return None
+
+    def put(self, user) -> Principal:
+        principal = Principal(id=user.id, email=user.email, role=user.role, is_active=user.is_active)
+        with self._lock:
+            self._entries[principal.email] = _CacheEntry(principal=principal, created_at=time.monotonic())
+            self._entries.move_to_end(principal.email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, subject: str):
+        now = time.time()
+        with self._lock:
+            self._entries.pop(subject, None)
+            # Tokens issued before this point can no longer vouch for the user through their claims.
+            self._revoked_at[subject] = now
+            self._revoked_at = {
+                key: revoked_at for key, revoked_at in self._revoked_at.items()
+                if now - revoked_at <= self.revocation_ttl_seconds
+            }
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.claim_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "claim_hits": self.claim_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.claim_hits) / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "trust_token_claims": self.trust_token_claims,
+            }
+
+    def _claims_usable(self, claims: Dict[str, Any]) -> bool:
+        if "uid" not in claims or "role" not in claims or "iat" not in claims:
+            return False
+        # Revocations are only known to the worker that made them; bound how long others can miss one.
+        if time.time() - claims["iat"] > self.ttl_seconds:
+            return False
+        revoked_at = self._revoked_at.get(claims["sub"])
+        return revoked_at is None or claims["iat"] > revoked_at
\ No newline at end of file
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Any
+
+ANAPHORA_PATTERN = re.compile(
+    r"\b(it|its|it's|they|them|their|theirs|this|that|these|those|he|she|him|her|his|hers|"
+    r"there|then|former|latter|above|previous|same|such|else|another|other|others|more|again)\b",
+    re.IGNORECASE
+)
+FOLLOW_UP_PATTERN = re.compile(
+    r"^\s*(and|but|so|also|or|what about|how about|why|why not|ok|okay|then|elaborate|explain more|"
+    r"tell me more|go on|continue|expand|same for|and what|what else)\b",
+    re.IGNORECASE
+)
+MIN_STANDALONE_WORDS = 4
+
+
+def needs_rewrite(message: str) -> bool:
+    if len(message.split()) < MIN_STANDALONE_WORDS:
+        return True
+    if FOLLOW_UP_PATTERN.search(message):
+        return True
+    return bool(ANAPHORA_PATTERN.search(message))
+
+
+def same_question(a: str, b: str) -> bool:
+    return re.sub(r"\W+", " ", a).strip().lower() == re.sub(r"\W+", " ", b).strip().lower()
+
+
+class QueryRewriter:
+    def __init__(self, rewrite: Callable[[str, List[Dict[str, str]]], str], cache_size: int):
+        self.rewrite_fn = rewrite
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.skipped_no_history = 0
+        self.skipped_standalone = 0
+        self.cache_hits = 0
+        self.llm_rewrites = 0
+        self.llm_seconds = 0.0
+        self.speculative_hits = 0
+        self.speculative_misses = 0
+        self.speculative_saved_seconds = 0.0
+
+    @staticmethod
+    def history_key(conversation_history: List[Dict[str, str]]) -> str:
+        payload = json.dumps(
+            [[msg["user_message"], msg["ai_response"]] for msg in conversation_history[-3:]],
+            ensure_ascii=False
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def lookup(self, message: str, conversation_history: Optional[List[Dict[str, str]]]) -> Optional[str]:
+        with self._lock:
+            self.requests += 1
+            if not conversation_history:
+                self.skipped_no_history += 1
+                return message
+            if not needs_rewrite(message):
+                self.skipped_standalone += 1
+                return message
+
+            key = (self.history_key(conversation_history), message)
+            rewritten = self._cache.get(key)
+            if rewritten is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+            return rewritten
+
+    def rewrite(self, message: str, conversation_history: List[Dict[str, str]]) -> str:
+        start = time.perf_counter()
+        rewritten = self.rewrite_fn(message, conversation_history)
+        elapsed = time.perf_counter() - start
+
+        key = (self.history_key(conversation_history), message)
+        with self._lock:
+            self.llm_rewrites += 1
+            self.llm_seconds += elapsed
+            self._cache[key] = rewritten
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rewritten
+
+    def record_speculation(self, hit: bool, saved_seconds: float = 0.0):
+        with self._lock:
+            if hit:
+                self.speculative_hits += 1
+                self.speculative_saved_seconds += saved_seconds
+            else:
+                self.speculative_misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            # Messages without history never made the rewrite call, so they are not counted as savings.
+            follow_ups = self.requests - self.skipped_no_history
+            skipped = self.skipped_standalone + self.cache_hits
+            avg_llm_seconds = self.llm_seconds / self.llm_rewrites if self.llm_rewrites else 0.0
+            return {
+                "requests": self.requests,
+                "follow_ups": follow_ups,
+                "skipped_no_history": self.skipped_no_history,
+                "skipped_standalone": self.skipped_standalone,
+                "cache_hits": self.cache_hits,
+                "llm_rewrites": self.llm_rewrites,
+                "skip_rate": skipped / follow_ups if follow_ups else 0.0,
+                "avg_llm_rewrite_seconds": avg_llm_seconds,
+                "speculative_hits": self.speculative_hits,
+                "speculative_misses": self.speculative_misses,
+                "estimated_seconds_saved": skipped * avg_llm_seconds + self.speculative_saved_seconds,
+            }
\ No newline at end of file
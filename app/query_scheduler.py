@@ -0,0 +1,173 @@
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Iterator, Hashable
+
+from app.config import settings
+
+
+class QueryQueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("GraphRAG query queue is full")
+        self.retry_after = retry_after
+
+
+class QueryScheduler:
+    def __init__(
+            self,
+            max_workers: int,
+            max_in_flight: int,
+            max_queued: int,
+            max_queued_per_user: int,
+            retry_after_seconds: int
+    ):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="graphrag-query")
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.max_queued_per_user = max_queued_per_user
+        self.retry_after_seconds = retry_after_seconds
+
+        self._waiting: "OrderedDict[Hashable, Deque[asyncio.Future]]" = OrderedDict()
+        self._in_flight = 0
+        self._queued = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def check_admission(self, user_key: Hashable = None):
+        if self._in_flight < self.max_in_flight and not self._waiting:
+            return
+        if self._queued >= self.max_queued or len(self._waiting.get(user_key, ())) >= self.max_queued_per_user:
+            self.rejected += 1
+            raise QueryQueueFull(self.retry_after_seconds)
+
+    @asynccontextmanager
+    async def slot(self, user_key: Hashable = None):
+        await self._acquire(user_key)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def run(self, user_key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+        async with self.slot(user_key):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def iterate(self, user_key: Hashable, fn: Callable[..., Iterator[Any]], *args: Any) -> AsyncIterator[Any]:
+        await self._acquire(user_key)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        finished = object()
+
+        def produce():
+            items = fn(*args)
+            try:
+                for item in items:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            finally:
+                items.close()
+                loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+        released = False
+
+        def release(future: asyncio.Future = None):
+            nonlocal released
+            if not released:
+                released = True
+                self._release()
+            if future is not None and not future.cancelled():
+                # Retrieved so an error nobody awaits after a disconnect is not reported as unhandled.
+                future.exception()
+
+        try:
+            producer = loop.run_in_executor(self.executor, produce)
+        except BaseException:
+            release()
+            raise
+        # The slot is held until the producer thread returns, not until the consumer goes away: a
+        # client that disconnects mid-generation must not let more than max_in_flight run at once.
+        producer.add_done_callback(release)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    break
+                yield item
+            await producer
+        finally:
+            stop.set()
+            if producer.done():
+                release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "waiting_users": len(self._waiting),
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    async def _acquire(self, user_key: Hashable):
+        self.check_admission(user_key)
+        if self._in_flight < self.max_in_flight and not self._waiting:
+            self._in_flight += 1
+            self.admitted += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_key, deque()).append(waiter)
+        self._queued += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            else:
+                self._forget(user_key, waiter)
+            raise
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _forget(self, user_key: Hashable, waiter: asyncio.Future):
+        waiters = self._waiting.get(user_key)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            self._queued -= 1
+            if not waiters:
+                del self._waiting[user_key]
+
+    def _dispatch(self):
+        while self._in_flight < self.max_in_flight and self._waiting:
+            user_key, waiters = next(iter(self._waiting.items()))
+            waiter = waiters.popleft()
+            self._queued -= 1
+            if waiters:
+                # Round-robin: the user goes to the back of the line after each grant.
+                self._waiting.move_to_end(user_key)
+            else:
+                del self._waiting[user_key]
+
+            if waiter.done():
+                continue
+            self._in_flight += 1
+            self.admitted += 1
+            waiter.set_result(None)
+
+
+query_scheduler = QueryScheduler(
+    max_workers=settings.graphrag_query_workers,
+    max_in_flight=settings.graphrag_max_in_flight,
+    max_queued=settings.graphrag_max_queued,
+    max_queued_per_user=settings.graphrag_max_queued_per_user,
+    retry_after_seconds=settings.graphrag_retry_after_seconds
+)
\ No newline at end of file
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
 from app.database import get_db
 from app.models import User, Conversation, Message, Document
-from app.auth import require_admin
+from app.auth import require_admin, principal_cache
+from app.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, after_id_cursor, after_timestamp_cursor, set_next_cursor
+)
+from app.graphrag_service import graphrag_service
+from app.query_scheduler import query_scheduler
+from app.blob_cache import read_published_stats
+from app.config import settings
 
 router = APIRouter()
 
@@ -28,12 +35,70 @@ class SystemStats(BaseModel):
     processed_documents: int
 
 
+class AnswerCacheStats(BaseModel):
+    entries: int
+    size_bytes: int
+    hits: int
+    semantic_hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    invalidations: int
+
+
+class QueryQueueStats(BaseModel):
+    in_flight: int
+    queued: int
+    waiting_users: int
+    max_in_flight: int
+    max_queued: int
+    admitted: int
+    rejected: int
+
+
+class QueryRewriteStats(BaseModel):
+    requests: int
+    follow_ups: int
+    skipped_no_history: int
+    skipped_standalone: int
+    cache_hits: int
+    llm_rewrites: int
+    skip_rate: float
+    avg_llm_rewrite_seconds: float
+    speculative_hits: int
+    speculative_misses: int
+    estimated_seconds_saved: float
+
+
+class AuthCacheStats(BaseModel):
+    entries: int
+    hits: int
+    claim_hits: int
+    misses: int
+    hit_ratio: float
+    invalidations: int
+    trust_token_claims: bool
+
+
+class BlobCacheStats(BaseModel):
+    entries: int
+    size_bytes: int
+    max_bytes: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    corrupt: int
+    published_at: datetime
+
+
 class ConversationAdmin(BaseModel):
     id: int
     user_email: str
     title: str
     message_count: int
     created_at: datetime
+    last_message_at: Optional[datetime] = None
 
 
 @router.get("/stats", response_model=SystemStats)
@@ -56,52 +121,96 @@ def get_system_stats(
     )
 
 
+@router.get("/cache", response_model=AnswerCacheStats)
+def get_answer_cache_stats(admin_user: User = Depends(require_admin)):
+    return AnswerCacheStats(**graphrag_service.answer_cache.stats())
+
+
+@router.delete("/cache")
+def clear_answer_cache(admin_user: User = Depends(require_admin)):
+    graphrag_service.answer_cache.clear()
+    return {"message": "Answer cache cleared"}
+
+
+@router.get("/query-queue", response_model=QueryQueueStats)
+def get_query_queue_stats(admin_user: User = Depends(require_admin)):
+    return QueryQueueStats(**query_scheduler.stats())
+
+
+@router.get("/query-rewrite", response_model=QueryRewriteStats)
+def get_query_rewrite_stats(admin_user: User = Depends(require_admin)):
+    return QueryRewriteStats(**graphrag_service.query_rewriter.stats())
+
+
+@router.get("/auth-cache", response_model=AuthCacheStats)
+def get_auth_cache_stats(admin_user: User = Depends(require_admin)):
+    return AuthCacheStats(**principal_cache.stats())
+
+
+@router.get("/blob-cache", response_model=BlobCacheStats)
+def get_blob_cache_stats(admin_user: User = Depends(require_admin)):
+    # Only the ingestion worker downloads; it publishes its counters into the shared cache directory.
+    if not settings.s3_cache_enabled:
+        raise HTTPException(status_code=404, detail="Blob cache is disabled")
+    stats = read_published_stats(settings.s3_cache_dir)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="The ingestion worker has not published blob cache stats yet")
+    return BlobCacheStats(**stats)
+
+
 @router.get("/users", response_model=List[UserStats])
 def get_all_users(
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
         admin_user: User = Depends(require_admin),
         db: Session = Depends(get_db)
 ):
-    users = db.query(User).all()
-    result = []
-
-    for user in users:
-        conversation_count = db.query(Conversation).filter(Conversation.user_id == user.id).count()
-        last_conversation = db.query(Conversation).filter(
-            Conversation.user_id == user.id
-        ).order_by(Conversation.created_at.desc()).first()
-
-        result.append(UserStats(
+    query = db.query(
+        User,
+        func.count(Conversation.id).label("conversation_count"),
+        func.max(func.coalesce(Conversation.last_message_at, Conversation.created_at)).label("last_active")
+    ).outerjoin(Conversation, Conversation.user_id == User.id).group_by(User.id)
+    rows = after_id_cursor(query, User.id, cursor).order_by(User.id).limit(limit + 1).all()
+    rows = set_next_cursor(response, rows, limit, lambda row: (row.User.id,))
+
+    return [
+        UserStats(
             id=user.id,
             email=user.email,
             role=user.role,
             conversation_count=conversation_count,
-            last_active=last_conversation.created_at if last_conversation else None
-        ))
-
-    return result
+            last_active=last_active
+        )
+        for user, conversation_count, last_active in rows
+    ]
 
 
 @router.get("/conversations", response_model=List[ConversationAdmin])
 def get_all_conversations(
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
         admin_user: User = Depends(require_admin),
         db: Session = Depends(get_db)
 ):
-    conversations = db.query(Conversation).join(User).order_by(
-        Conversation.created_at.desc()
-    ).all()
-
-    result = []
-    for conv in conversations:
-        message_count = db.query(Message).filter(Message.conversation_id == conv.id).count()
-        result.append(ConversationAdmin(
+    query = db.query(Conversation, User.email).join(User)
+    rows = after_timestamp_cursor(query, Conversation.created_at, Conversation.id, cursor).order_by(
+        Conversation.created_at.desc(), Conversation.id.desc()
+    ).limit(limit + 1).all()
+    rows = set_next_cursor(response, rows, limit, lambda row: (row.Conversation.created_at, row.Conversation.id))
+
+    return [
+        ConversationAdmin(
             id=conv.id,
-            user_email=conv.user.email,
+            user_email=email,
             title=conv.title,
-            message_count=message_count,
-            created_at=conv.created_at
-        ))
-
-    return result
+            message_count=conv.message_count,
+            created_at=conv.created_at,
+            last_message_at=conv.last_message_at
+        )
+        for conv, email in rows
+    ]
 
 
 @router.delete("/users/{user_id}")
@@ -114,6 +223,8 @@ def delete_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
+    email = user.email
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(email)
     return {"message": "User deleted successfully"}
\ No newline at end of file
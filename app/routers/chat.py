@@ -1,16 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional, Dict, Tuple
 from datetime import datetime
+import json
 
-from app.database import get_db
-from app.models import User, Conversation, Message
-from app.auth import get_current_user
+from app.config import settings
+from app.database import get_async_db, AsyncSessionLocal
+from app.models import User, Conversation, Message, Document, DocumentChunk
+from app.auth import get_current_user_async
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, after_timestamp_cursor, set_next_cursor
 from app.graphrag_service import graphrag_service
+from app.query_scheduler import query_scheduler, QueryQueueFull
 
 router = APIRouter()
 
+MAX_RETRIEVED_ITEMS = 50
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -22,6 +30,57 @@ class ChatResponse(BaseModel):
     conversation_id: int
 
 
+class RetrieveRequest(BaseModel):
+    message: str
+    conversation_id: Optional[int] = None
+    max_chunks: int = Field(8, ge=1, le=MAX_RETRIEVED_ITEMS)
+    max_entities: int = Field(20, ge=1, le=MAX_RETRIEVED_ITEMS)
+    max_relations: int = Field(20, ge=1, le=MAX_RETRIEVED_ITEMS)
+
+
+class BatchRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1, max_length=settings.batch_max_questions)
+    max_parallel: Optional[int] = Field(None, ge=1)
+
+
+class RetrievedChunk(BaseModel):
+    id: int
+    content: str
+    score: float
+    section_hash: Optional[str] = None
+    # Every document the chunk's text appears in, not only the one it was first inserted from.
+    document_ids: List[int]
+
+
+class RetrievedEntity(BaseModel):
+    name: str
+    type: str
+    description: str
+    score: float
+
+
+class RetrievedRelation(BaseModel):
+    source: str
+    target: str
+    description: str
+    score: float
+
+
+class SourceDocument(BaseModel):
+    id: int
+    filename: str
+
+
+class RetrieveResponse(BaseModel):
+    question: str
+    chunks: List[RetrievedChunk]
+    entities: List[RetrievedEntity]
+    relations: List[RetrievedRelation]
+    # In the order their first chunk ranks.
+    documents: List[SourceDocument]
+    retrieval_seconds: float
+
+
 class MessageResponse(BaseModel):
     id: int
     user_message: str
@@ -34,19 +93,16 @@ class ConversationResponse(BaseModel):
     title: str
     created_at: datetime
     message_count: int
+    last_message_at: Optional[datetime] = None
 
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(
-        request: ChatRequest,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
-):
+async def _get_or_create_conversation(db: AsyncSession, request: ChatRequest, current_user: User) -> Conversation:
     if request.conversation_id:
-        conversation = db.query(Conversation).filter(
+        result = await db.execute(select(Conversation).where(
             Conversation.id == request.conversation_id,
             Conversation.user_id == current_user.id
-        ).first()
+        ))
+        conversation = result.scalars().first()
 
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
@@ -57,14 +113,19 @@ async def chat(
             created_at=datetime.utcnow()
         )
         db.add(conversation)
-        db.commit()
-        db.refresh(conversation)
+        await db.commit()
+        await db.refresh(conversation)
+
+    return conversation
 
-    recent_messages = db.query(Message).filter(
-        Message.conversation_id == conversation.id
-    ).order_by(Message.timestamp.desc()).limit(3).all()
 
-    conversation_history = [
+async def _get_conversation_history(db: AsyncSession, conversation_id: int) -> List[Dict[str, str]]:
+    result = await db.execute(select(Message).where(
+        Message.conversation_id == conversation_id
+    ).order_by(Message.timestamp.desc()).limit(3))
+    recent_messages = result.scalars().all()
+
+    return [
         {
             "user_message": msg.user_message,
             "ai_response": msg.ai_response
@@ -72,63 +133,213 @@ async def chat(
         for msg in reversed(recent_messages)
     ]
 
-    ai_response = await graphrag_service.query_async(request.message, conversation_history)
 
+async def _save_message(db: AsyncSession, conversation_id: int, user_message: str, ai_response: str) -> Message:
+    timestamp = datetime.utcnow()
     new_message = Message(
-        conversation_id=conversation.id,
-        user_message=request.message,
+        conversation_id=conversation_id,
+        user_message=user_message,
         ai_response=ai_response,
-        timestamp=datetime.utcnow()
+        timestamp=timestamp
     )
 
     db.add(new_message)
-    db.commit()
-    db.refresh(new_message)
+    await db.execute(update(Conversation).where(Conversation.id == conversation_id).values(
+        message_count=Conversation.message_count + 1,
+        last_message_at=timestamp
+    ))
+    await db.commit()
+    await db.refresh(new_message)
+    return new_message
+
+
+async def _chunk_provenance(
+        db: AsyncSession,
+        chunks: List[Dict[str, Any]]
+) -> Tuple[List[List[int]], Dict[int, str]]:
+    """Documents each chunk comes from, and their filenames; deleted documents are left out."""
+    section_hashes = {chunk["section_hash"] for chunk in chunks if chunk["section_hash"]}
+    by_section: Dict[str, List[int]] = {}
+    filenames: Dict[int, str] = {}
+    if section_hashes:
+        result = await db.execute(select(DocumentChunk.content_hash, Document.id, Document.filename).join(
+            Document, DocumentChunk.document_id == Document.id
+        ).where(DocumentChunk.content_hash.in_(section_hashes)).distinct().order_by(Document.id))
+        for section_hash, document_id, filename in result:
+            by_section.setdefault(section_hash, []).append(document_id)
+            filenames[document_id] = filename
+
+    # Chunks of documents processed before their sections were recorded only know where they were inserted from.
+    inserted_from = {
+        chunk["document_id"] for chunk in chunks
+        if chunk["document_id"] is not None and not by_section.get(chunk["section_hash"])
+    } - filenames.keys()
+    if inserted_from:
+        result = await db.execute(select(Document.id, Document.filename).where(Document.id.in_(inserted_from)))
+        filenames.update({document_id: filename for document_id, filename in result})
+
+    document_ids = [
+        by_section.get(chunk["section_hash"]) or ([chunk["document_id"]] if chunk["document_id"] in filenames else [])
+        for chunk in chunks
+    ]
+    return document_ids, filenames
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(
+        request: ChatRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user_async)
+):
+    user_id = current_user.id
+    query_scheduler.check_admission(user_id)
+
+    conversation = await _get_or_create_conversation(db, request, current_user)
+    conversation_id = conversation.id
+    conversation_history = await _get_conversation_history(db, conversation_id)
+    # Hand the connection back to the pool while the query waits in the scheduler and runs;
+    # saving the messages opens a short transaction of its own.
+    await db.close()
+
+    ai_response = await graphrag_service.query_async(request.message, conversation_history, user_id)
+
+    await _save_message(db, conversation_id, request.message, ai_response)
 
     return ChatResponse(
         response=ai_response,
-        conversation_id=conversation.id
+        conversation_id=conversation_id
     )
 
 
-@router.get("/conversations", response_model=List[ConversationResponse])
-def get_conversations(
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+@router.post("/chat/stream")
+async def chat_stream(
+        request: ChatRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user_async)
 ):
-    conversations = db.query(Conversation).filter(
-        Conversation.user_id == current_user.id
-    ).order_by(Conversation.created_at.desc()).all()
-
-    result = []
-    for conv in conversations:
-        message_count = db.query(Message).filter(Message.conversation_id == conv.id).count()
-        result.append(ConversationResponse(
-            id=conv.id,
-            title=conv.title,
-            created_at=conv.created_at,
-            message_count=message_count
+    user_id = current_user.id
+    query_scheduler.check_admission(user_id)
+
+    conversation = await _get_or_create_conversation(db, request, current_user)
+    conversation_id = conversation.id
+    conversation_history = await _get_conversation_history(db, conversation_id)
+
+    async def event_stream():
+        yield json.dumps({"type": "conversation", "conversation_id": conversation_id}) + "\n"
+
+        ai_response = None
+        async for event in graphrag_service.stream_query_async(request.message, conversation_history, user_id):
+            if event["type"] == "done":
+                ai_response = event["response"]
+            yield json.dumps(event) + "\n"
+
+        if ai_response is not None:
+            async with AsyncSessionLocal() as stream_db:
+                await _save_message(stream_db, conversation_id, request.message, ai_response)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/retrieve", response_model=RetrieveResponse)
+async def retrieve(
+        request: RetrieveRequest,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: User = Depends(get_current_user_async)
+):
+    conversation_history = None
+    if request.conversation_id:
+        result = await db.execute(select(Conversation.id).where(
+            Conversation.id == request.conversation_id,
+            Conversation.user_id == current_user.id
         ))
+        if result.first() is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        conversation_history = await _get_conversation_history(db, request.conversation_id)
+    user_id = current_user.id
+    # As in chat(): no pooled connection is held while retrieval is queued.
+    await db.close()
+
+    try:
+        retrieved = await graphrag_service.retrieve_async(
+            request.message,
+            conversation_history,
+            user_id,
+            request.max_chunks,
+            request.max_entities,
+            request.max_relations
+        )
+    except QueryQueueFull:
+        raise
+    except Exception:
+        raise HTTPException(status_code=503, detail="Retrieval is unavailable right now. Please try again later.")
+
+    document_ids, filenames = await _chunk_provenance(db, retrieved["chunks"])
+    documents: Dict[int, SourceDocument] = {}
+    for chunk, chunk_document_ids in zip(retrieved["chunks"], document_ids):
+        chunk["document_ids"] = chunk_document_ids
+        for document_id in chunk_document_ids:
+            documents.setdefault(document_id, SourceDocument(id=document_id, filename=filenames[document_id]))
+
+    return RetrieveResponse(documents=list(documents.values()), **retrieved)
+
 
-    return result
+@router.post("/batch")
+async def batch(
+        request: BatchRequest,
+        current_user: User = Depends(get_current_user_async)
+):
+    if not any(question.strip() for question in request.questions):
+        raise HTTPException(status_code=400, detail="No questions to answer")
+    user_id = current_user.id
+    query_scheduler.check_admission(user_id)
+
+    async def event_stream():
+        async for event in graphrag_service.batch_query_async(request.questions, user_id, request.max_parallel):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/conversations", response_model=List[ConversationResponse])
+async def get_conversations(
+        response: Response,
+        cursor: Optional[str] = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        current_user: User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
+):
+    query = select(Conversation).where(Conversation.user_id == current_user.id)
+    result = await db.execute(after_timestamp_cursor(query, Conversation.created_at, Conversation.id, cursor).order_by(
+        Conversation.created_at.desc(), Conversation.id.desc()
+    ).limit(limit + 1))
+    return set_next_cursor(response, result.scalars().all(), limit, lambda conv: (conv.created_at, conv.id))
 
 
 @router.get("/conversations/{conversation_id}/messages", response_model=List[MessageResponse])
-def get_conversation_messages(
+async def get_conversation_messages(
         conversation_id: int,
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    conversation = db.query(Conversation).filter(
+    result = await db.execute(select(Conversation).where(
         Conversation.id == conversation_id,
         Conversation.user_id == current_user.id
-    ).first()
+    ))
+    conversation = result.scalars().first()
 
     if not conversation:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
-    messages = db.query(Message).filter(
+    result = await db.execute(select(Message).where(
         Message.conversation_id == conversation_id
-    ).order_by(Message.timestamp).all()
+    ).order_by(Message.timestamp))
 
-    return messages
\ No newline at end of file
+    return result.scalars().all()
\ No newline at end of file
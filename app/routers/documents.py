@@ -1,18 +1,25 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
+import hashlib
 import uuid
 from datetime import datetime
 
-from app.database import get_db
-from app.models import User, Document
-from app.auth import get_current_user, require_admin
+from app.database import get_db, get_async_db
+from app.models import User, Document, DocumentChunk, GraphRemoval, IngestionJob
+from app.auth import get_current_user_async, require_admin
 from app.s3_service import s3_service
-from app.graphrag_service import graphrag_service
+from app.ingestion import enqueue_document, job_is_running
 
 router = APIRouter()
 
+HASH_BLOCK_SIZE = 1024 * 1024
+
 
 class DocumentResponse(BaseModel):
     id: int
@@ -25,13 +32,61 @@ class DocumentResponse(BaseModel):
 class UploadResponse(BaseModel):
     message: str
     document_id: int
+    duplicate: bool = False
+
+
+class BulkProcessRequest(BaseModel):
+    document_ids: List[int]
+    # Run processed documents again, e.g. after the chunking settings changed.
+    reprocess: bool = False
+
+
+class BulkProcessResult(BaseModel):
+    document_id: int
+    job_id: Optional[int] = None
+    status: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class IngestionJobResponse(BaseModel):
+    id: int
+    document_id: int
+    status: str
+    progress: int
+    attempts: int
+    max_attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+def _hash_file(file_obj) -> str:
+    digest = hashlib.sha256()
+    for block in iter(lambda: file_obj.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+async def _document_by_hash(db: AsyncSession, file_hash: str) -> Optional[Document]:
+    result = await db.execute(select(Document).where(Document.content_hash == file_hash))
+    return result.scalars().first()
+
+
+def _duplicate_response(document: Document) -> UploadResponse:
+    return UploadResponse(
+        message="File already uploaded",
+        document_id=document.id,
+        duplicate=True
+    )
 
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_document(
         file: UploadFile = File(...),
-        current_user: User = Depends(get_current_user),
-        db: Session = Depends(get_db)
+        current_user: User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
     if current_user.role not in ["admin", "staff"]:
         raise HTTPException(status_code=403, detail="Insufficient permissions")
@@ -39,9 +94,14 @@ async def upload_document(
     if not file.filename.lower().endswith(('.pdf', '.docx', '.doc')):
         raise HTTPException(status_code=400, detail="Only PDF and DOCX files are supported")
 
+    file_hash = await run_in_threadpool(_hash_file, file.file)
+    existing = await _document_by_hash(db, file_hash)
+    if existing:
+        return _duplicate_response(existing)
+
     file_key = f"documents/{uuid.uuid4()}_{file.filename}"
 
-    if not s3_service.upload_file(file.file, file_key):
+    if not await run_in_threadpool(s3_service.upload_file, file.file, file_key):
         raise HTTPException(status_code=500, detail="Failed to upload file")
 
     document = Document(
@@ -49,11 +109,21 @@ async def upload_document(
         s3_key=file_key,
         uploaded_by=current_user.id,
         file_size=file.size if hasattr(file, 'size') else 0,
-        content_type=file.content_type
+        content_type=file.content_type,
+        content_hash=file_hash
     )
     db.add(document)
-    db.commit()
-    db.refresh(document)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent upload of the same file won the unique index.
+        await db.rollback()
+        await run_in_threadpool(s3_service.delete_file, file_key)
+        existing = await _document_by_hash(db, file_hash)
+        if existing is None:
+            raise
+        return _duplicate_response(existing)
+    await db.refresh(document)
 
     return UploadResponse(
         message="File uploaded successfully",
@@ -62,17 +132,45 @@ async def upload_document(
 
 
 @router.get("/", response_model=List[DocumentResponse])
-def list_documents(
-        current_user: User = Depends(get_current_user),
+async def list_documents(
+        current_user: User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(select(Document).order_by(Document.uploaded_at.desc()))
+    return result.scalars().all()
+
+
+@router.post("/process/bulk", response_model=List[BulkProcessResult], status_code=202)
+def process_documents_bulk(
+        request: BulkProcessRequest,
+        admin_user: User = Depends(require_admin),
         db: Session = Depends(get_db)
 ):
-    documents = db.query(Document).order_by(Document.uploaded_at.desc()).all()
-    return documents
+    document_ids = list(dict.fromkeys(request.document_ids))
+    documents = {doc.id: doc for doc in db.query(Document).filter(Document.id.in_(document_ids)).all()}
+    jobs = {
+        job.document_id: job
+        for job in db.query(IngestionJob).filter(IngestionJob.document_id.in_(document_ids)).all()
+    }
+
+    results = []
+    for document_id in document_ids:
+        document = documents.get(document_id)
+        if document is None:
+            results.append(BulkProcessResult(document_id=document_id, detail="Document not found"))
+        elif document.processed and document_id not in jobs and not request.reprocess:
+            results.append(BulkProcessResult(document_id=document_id, detail="Document already processed"))
+        else:
+            job = enqueue_document(db, document, request.reprocess)
+            results.append(BulkProcessResult(document_id=document_id, job_id=job.id, status=job.status))
+
+    return results
 
 
-@router.post("/process/{document_id}")
+@router.post("/process/{document_id}", response_model=IngestionJobResponse, status_code=202)
 def process_document(
         document_id: int,
+        reprocess: bool = False,
         admin_user: User = Depends(require_admin),
         db: Session = Depends(get_db)
 ):
@@ -80,40 +178,35 @@ def process_document(
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    if document.processed:
+    existing_job = db.query(IngestionJob).filter(IngestionJob.document_id == document_id).first()
+    if document.processed and existing_job is None and not reprocess:
         raise HTTPException(status_code=400, detail="Document already processed")
 
-    file_content = s3_service.download_file(document.s3_key)
-    if not file_content:
-        raise HTTPException(status_code=500, detail="Failed to download file from S3")
-
-    try:
-        if document.filename.lower().endswith('.pdf'):
-            text_content = extract_pdf_text(file_content)
-        elif document.filename.lower().endswith(('.docx', '.doc')):
-            text_content = extract_docx_text(file_content)
-        else:
-            raise HTTPException(status_code=400, detail="Unsupported file type")
-
-        document_content = f"""
-DOCUMENT METADATA:
-- Filename: {document.filename}
-- Uploaded: {document.uploaded_at}
-- File Size: {document.file_size} bytes
-
-DOCUMENT CONTENT:
-{text_content}
-"""
+    return enqueue_document(db, document, reprocess)
 
-        graphrag_service.add_document(document_content)
 
-        document.processed = True
-        db.commit()
+@router.get("/process/{document_id}", response_model=IngestionJobResponse)
+def get_processing_status(
+        document_id: int,
+        admin_user: User = Depends(require_admin),
+        db: Session = Depends(get_db)
+):
+    job = db.query(IngestionJob).filter(IngestionJob.document_id == document_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="No processing job for this document")
+    return job
 
-        return {"message": "Document processed successfully"}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+@router.get("/jobs", response_model=List[IngestionJobResponse])
+def list_ingestion_jobs(
+        status: Optional[str] = None,
+        admin_user: User = Depends(require_admin),
+        db: Session = Depends(get_db)
+):
+    query = db.query(IngestionJob)
+    if status:
+        query = query.filter(IngestionJob.status == status)
+    return query.order_by(IngestionJob.created_at.desc()).limit(100).all()
 
 
 @router.delete("/{document_id}")
@@ -125,38 +218,20 @@ def delete_document(
     document = db.query(Document).filter(Document.id == document_id).first()
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
+    # Locked so a worker cannot claim the job between this check and the delete.
+    job = db.query(IngestionJob).filter(IngestionJob.document_id == document_id).with_for_update().first()
+    if job is not None and job_is_running(job):
+        raise HTTPException(status_code=409, detail="Document is being processed; delete it once processing finishes")
 
     s3_service.delete_file(document.s3_key)
+    db.query(IngestionJob).filter(IngestionJob.document_id == document_id).delete()
+    # The ingestion worker drops these sections from the graph unless another document still has them.
+    db.add_all(
+        GraphRemoval(section_hash=row.content_hash, document_id=document_id)
+        for row in db.query(DocumentChunk.content_hash).filter(DocumentChunk.document_id == document_id).distinct()
+    )
+    db.query(DocumentChunk).filter(DocumentChunk.document_id == document_id).delete()
     db.delete(document)
     db.commit()
 
-    return {"message": "Document deleted successfully"}
-
-
-def extract_pdf_text(content: bytes) -> str:
-    import PyPDF2
-    import io
-
-    pdf_file = io.BytesIO(content)
-    pdf_reader = PyPDF2.PdfReader(pdf_file)
-
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text() + "\n"
-
-    return text.strip()
-
-
-def extract_docx_text(content: bytes) -> str:
-    from docx import Document
-    import io
-
-    docx_file = io.BytesIO(content)
-    doc = Document(docx_file)
-
-    text_parts = []
-    for paragraph in doc.paragraphs:
-        if paragraph.text.strip():
-            text_parts.append(paragraph.text.strip())
-
-    return "\n".join(text_parts)
\ No newline at end of file
+    return {"message": "Document deleted successfully"}
\ No newline at end of file
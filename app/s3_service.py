@@ -1,32 +1,87 @@
+import threading
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
-from typing import Optional
+from typing import BinaryIO, Optional
+from app.blob_cache import BlobCache
 from app.config import settings
 
 
 class S3Service:
     def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.aws_access_key_id,
-            aws_secret_access_key=settings.aws_secret_access_key,
-            region_name=settings.aws_region
-        )
+        self._s3_client = None
+        self._cache: Optional[BlobCache] = None
+        self._client_lock = threading.Lock()
         self.bucket_name = settings.s3_bucket_name
+        # Objects above the threshold move in parts, several at a time, so memory stays at roughly
+        # part size x concurrency however large the file is.
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.s3_multipart_threshold,
+            multipart_chunksize=settings.s3_part_size,
+            max_concurrency=settings.s3_max_concurrency,
+            io_chunksize=min(settings.s3_part_size, 256 * 1024)
+        )
+        # s3transfer otherwise buffers up to 10 upload parts and 1000 download chunks ahead.
+        self.transfer_config.max_in_memory_upload_chunks = settings.s3_max_concurrency
+        self.transfer_config.max_in_memory_download_chunks = max(
+            settings.s3_part_size * settings.s3_max_concurrency // self.transfer_config.io_chunksize, 1
+        )
+
+    @property
+    def s3_client(self):
+        # Creating a boto3 client loads the service model, so wait until S3 is actually used.
+        if self._s3_client is None:
+            with self._client_lock:
+                if self._s3_client is None:
+                    self._s3_client = boto3.client(
+                        's3',
+                        aws_access_key_id=settings.aws_access_key_id,
+                        aws_secret_access_key=settings.aws_secret_access_key,
+                        region_name=settings.aws_region,
+                        endpoint_url=settings.s3_endpoint_url
+                    )
+        return self._s3_client
+
+    @property
+    def cache(self) -> Optional[BlobCache]:
+        # Opening the cache scans its directory; only the ingestion worker downloads, so wait until it does.
+        if self._cache is None and settings.s3_cache_enabled:
+            with self._client_lock:
+                if self._cache is None:
+                    self._cache = BlobCache(settings.s3_cache_dir, settings.s3_cache_max_bytes)
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: Optional[BlobCache]):
+        self._cache = cache
 
-    def upload_file(self, file_obj, object_key: str) -> bool:
+    def upload_file(self, file_obj: BinaryIO, object_key: str) -> bool:
+        """Stream a file object to S3, as a multipart upload when it is large. Blocks; keep it off the event loop."""
         try:
-            self.s3_client.upload_fileobj(file_obj, self.bucket_name, object_key)
+            self.s3_client.upload_fileobj(file_obj, self.bucket_name, object_key, Config=self.transfer_config)
             return True
         except ClientError:
             return False
 
-    def download_file(self, object_key: str) -> Optional[bytes]:
+    def download_to_file(self, object_key: str, file_obj: BinaryIO, content_hash: Optional[str] = None) -> bool:
+        """Write an object into a seekable file with ranged GETs of one part each.
+
+        With the sha256 of the content, the local blob cache is tried first and filled on a miss.
+        """
+        if content_hash is None or self.cache is None:
+            return self._download(object_key, file_obj)
+        if self.cache.read_into(content_hash, file_obj):
+            return True
+        if self.cache.fill(content_hash, lambda tmp: self._download(object_key, tmp)):
+            return self.cache.read_into(content_hash, file_obj, record=False)
+        return self._download(object_key, file_obj)
+
+    def _download(self, object_key: str, file_obj: BinaryIO) -> bool:
         try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=object_key)
-            return response['Body'].read()
+            self.s3_client.download_fileobj(self.bucket_name, object_key, file_obj, Config=self.transfer_config)
+            return True
         except ClientError:
-            return None
+            return False
 
     def delete_file(self, object_key: str) -> bool:
         try:
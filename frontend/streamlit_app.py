@@ -5,6 +5,8 @@ from datetime import datetime
 import time
 
 API_BASE_URL = "http://localhost:8000/api"
+# The sidebar lists this many conversations at first and this many more per "Show older" click.
+CONVERSATIONS_PER_PAGE = 15
 
 # Page config
 st.set_page_config(
@@ -77,6 +79,8 @@ def init_session_state():
         st.session_state.messages = []
     if 'conversations' not in st.session_state:
         st.session_state.conversations = []
+    if 'conversations_shown' not in st.session_state:
+        st.session_state.conversations_shown = CONVERSATIONS_PER_PAGE
 
 
 def login(email, password):
@@ -103,7 +107,7 @@ def login(email, password):
 
 
 def logout():
-    for key in ['token', 'user', 'conversation_id', 'messages', 'conversations']:
+    for key in ['token', 'user', 'conversation_id', 'messages', 'conversations', 'conversations_shown']:
         if key in st.session_state:
             del st.session_state[key]
     st.rerun()
@@ -116,34 +120,73 @@ def send_message(message):
         if st.session_state.conversation_id:
             payload["conversation_id"] = st.session_state.conversation_id
 
-        response = requests.post(
-            f"{API_BASE_URL}/chat/chat",
-            json=payload,
-            headers=headers
-        )
+        with requests.post(
+                f"{API_BASE_URL}/chat/chat/stream",
+                json=payload,
+                headers=headers,
+                stream=True
+        ) as response:
+            if response.status_code != 200:
+                yield "Sorry, I encountered an error processing your request."
+                return
+
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event["type"] == "conversation":
+                    st.session_state.conversation_id = event["conversation_id"]
+                elif event["type"] in ("token", "error"):
+                    yield event["content"]
+    except Exception:
+        yield "Sorry, I'm having trouble connecting right now."
 
-        if response.status_code == 200:
-            data = response.json()
-            st.session_state.conversation_id = data["conversation_id"]
-            return data["response"]
-        else:
-            return "Sorry, I encountered an error processing your request."
+
+def send_batch(questions):
+    try:
+        headers = {"Authorization": f"Bearer {st.session_state.token}"}
+        with requests.post(
+                f"{API_BASE_URL}/chat/batch",
+                json={"questions": questions},
+                headers=headers,
+                stream=True
+        ) as response:
+            if response.status_code != 200:
+                yield {"type": "error", "content": "Sorry, the batch could not be started."}
+                return
+
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield json.loads(line)
     except Exception:
-        return "Sorry, I'm having trouble connecting right now."
+        yield {"type": "error", "content": "Sorry, I'm having trouble connecting right now."}
 
 
-def get_conversations():
+def get_conversations(count):
+    """The newest count conversations, following the API's cursor; also whether there are older ones."""
+    conversations = []
+    cursor = None
     try:
         headers = {"Authorization": f"Bearer {st.session_state.token}"}
-        response = requests.get(
-            f"{API_BASE_URL}/chat/conversations",
-            headers=headers
-        )
-        if response.status_code == 200:
-            return response.json()
-        return []
+        while len(conversations) < count:
+            # The API serves at most 200 per page.
+            params = {"limit": min(count - len(conversations), 200)}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(
+                f"{API_BASE_URL}/chat/conversations",
+                headers=headers,
+                params=params
+            )
+            if response.status_code != 200:
+                break
+            conversations.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
     except Exception:
-        return []
+        pass
+    return conversations, cursor is not None
 
 
 def load_conversation_messages(conv_id):
@@ -268,11 +311,11 @@ def render_sidebar():
         # Conversations list
         st.markdown("### 💬 Recent Conversations")
 
-        conversations = get_conversations()
+        conversations, has_older = get_conversations(st.session_state.conversations_shown)
         st.session_state.conversations = conversations
 
         if conversations:
-            for conv in conversations[:15]:
+            for conv in conversations:
                 # Create a button for each conversation
                 conv_title = conv['title'][:40] + ("..." if len(conv['title']) > 40 else "")
                 conv_date = datetime.fromisoformat(conv['created_at'].replace('Z', '+00:00')).strftime("%b %d, %Y")
@@ -286,6 +329,10 @@ def render_sidebar():
                     with st.spinner("Loading conversation..."):
                         if load_conversation_messages(conv['id']):
                             st.rerun()
+
+            if has_older and st.button("Show older conversations", use_container_width=True):
+                st.session_state.conversations_shown += CONVERSATIONS_PER_PAGE
+                st.rerun()
         else:
             st.info("No conversations yet. Start a new one!")
 
@@ -322,11 +369,46 @@ def render_sidebar():
             logout()
 
 
+def render_batch_questions():
+    with st.expander("📋 Answer a list of questions"):
+        text = st.text_area(
+            "Questions",
+            placeholder="Paste one question per line, e.g. from a funder's application form",
+            height=200
+        )
+        if st.button("Answer all", key="batch_btn", type="primary"):
+            questions = [line.strip() for line in text.splitlines() if line.strip()]
+            if not questions:
+                st.error("Please enter at least one question.")
+                return
+
+            # One slot per question, filled in as answers arrive.
+            slots = [st.empty() for _ in questions]
+            for slot, question in zip(slots, questions):
+                slot.markdown(f"**{question}**\n\n_Waiting..._")
+
+            for event in send_batch(questions):
+                if event["type"] in ("answer", "error") and "indices" in event:
+                    content = event.get("answer") or event["content"]
+                    for index in event["indices"]:
+                        slots[index].markdown(f"**{questions[index]}**\n\n{content}")
+                elif event["type"] == "error":
+                    st.error(event["content"])
+                elif event["type"] == "summary":
+                    speedup = f", {event['speedup']:.1f}x faster than one at a time" if event["speedup"] else ""
+                    st.caption(
+                        f"{event['questions']} questions ({event['unique']} unique) answered in "
+                        f"{event['wall_seconds']:.1f}s{speedup}"
+                    )
+
+
 def render_chat_interface():
     # Header
     st.markdown("## 🔗 NSF Graph RAG")
     st.markdown("Ask questions about Next Step Foundation programs, impact reports, and initiatives.")
 
+    render_batch_questions()
+
     # Chat container
     chat_container = st.container()
 
@@ -347,9 +429,7 @@ def render_chat_interface():
 
         # Get and display assistant response
         with st.chat_message("assistant"):
-            with st.spinner("Thinking..."):
-                response = send_message(prompt)
-            st.markdown(response)
+            response = st.write_stream(send_message(prompt))
 
         # Add assistant message to history
         st.session_state.messages.append({"role": "assistant", "content": response})
@@ -0,0 +1,127 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def ensure_user(email: str, password: str):
+    from app.auth import get_password_hash
+    from app.database import SessionLocal
+    from app.models import User
+
+    db = SessionLocal()
+    try:
+        if not db.query(User).filter(User.email == email).first():
+            db.add(User(email=email, password_hash=get_password_hash(password), role="staff"))
+            db.commit()
+    finally:
+        db.close()
+
+
+def make_client(base_url: str) -> httpx.AsyncClient:
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=60)
+    from app.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+
+async def login(client, email, password):
+    return await client.post("/api/auth/login", data={"username": email, "password": password})
+
+
+async def probe(client, headers, stop: asyncio.Event, interval: float, latencies: list):
+    # An unrelated authenticated endpoint, to see whether logins starve other requests.
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/auth/me", headers=headers)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+
+
+async def storm(client, email, password, logins: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, rejected = [], 0
+
+    async def one():
+        nonlocal rejected
+        async with semaphore:
+            start = time.perf_counter()
+            response = await login(client, email, password)
+            if response.status_code == 503:
+                rejected += 1
+                return
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    return latencies, rejected, time.perf_counter() - start
+
+
+async def run(args):
+    async with make_client(args.base_url) as client:
+        response = await login(client, args.email, args.password)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        baseline = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, headers, stop, args.probe_interval, baseline))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        await task
+
+        during = []
+        stop = asyncio.Event()
+        task = asyncio.create_task(probe(client, headers, stop, args.probe_interval, during))
+        login_latencies, rejected, elapsed = await storm(client, args.email, args.password, args.logins, args.concurrency)
+        stop.set()
+        await task
+
+    if not args.base_url:
+        from app.database import async_engine
+        # Pooled aiosqlite connections each hold a thread that would keep the interpreter alive.
+        await async_engine.dispose()
+
+    print(f"Logins: {len(login_latencies)} ok, {rejected} rejected in {elapsed:.2f}s "
+          f"({len(login_latencies) / elapsed:.1f}/s)")
+    print(f"Login latency: p50 {percentile(login_latencies, 0.5) * 1000:.0f}ms, "
+          f"p99 {percentile(login_latencies, 0.99) * 1000:.0f}ms")
+    for name, samples in [("idle", baseline), ("during storm", during)]:
+        print(f"/api/auth/me {name}: {len(samples)} requests, "
+              f"mean {statistics.mean(samples) * 1000:.1f}ms, p99 {percentile(samples, 0.99) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Login storm benchmark")
+    parser.add_argument("--base-url", help="Benchmark a running server instead of the app in-process")
+    parser.add_argument("--email", default="bench-login@example.com")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    parser.add_argument("--probe-interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    if not args.base_url:
+        ensure_user(args.email, args.password)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so every measurement is a real cold start.
+PROBE = """
+import json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    serving = time.perf_counter()
+    client.get("/health").raise_for_status()
+    while client.get("/ready").status_code != 200:
+        if time.perf_counter() - serving > {ready_timeout}:
+            break
+        time.sleep(0.05)
+    ready = time.perf_counter()
+    state = client.get("/ready").json()["graphrag"]["state"]
+
+print("STARTUP " + json.dumps({{
+    "import_seconds": imported - start,
+    "serving_seconds": serving - start,
+    "ready_seconds": ready - start,
+    "graphrag_state": state,
+}}))
+"""
+
+
+def run_once(ready_timeout: float) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(ready_timeout=ready_timeout)],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--max-serving-seconds", type=float,
+                        help="Exit non-zero when the median time until requests are served exceeds this")
+    args = parser.parse_args()
+
+    print("NSF AI App Startup Benchmark")
+    print("=" * 30)
+
+    runs = []
+    for i in range(args.runs):
+        run = run_once(args.ready_timeout)
+        runs.append(run)
+        print(f"Run {i + 1}: import {run['import_seconds']:.2f}s, serving {run['serving_seconds']:.2f}s, "
+              f"ready {run['ready_seconds']:.2f}s ({run['graphrag_state']})")
+
+    medians = {key: statistics.median(run[key] for run in runs)
+               for key in ("import_seconds", "serving_seconds", "ready_seconds")}
+    print(f"\nMedian: import {medians['import_seconds']:.2f}s, serving {medians['serving_seconds']:.2f}s, "
+          f"ready {medians['ready_seconds']:.2f}s")
+
+    if args.max_serving_seconds is not None and medians["serving_seconds"] > args.max_serving_seconds:
+        print(f"❌ Startup regression: serving after {medians['serving_seconds']:.2f}s "
+              f"(limit {args.max_serving_seconds:.2f}s)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,115 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import hashlib
+import io
+import tempfile
+
+
+def _download(service, object_key: str, digest: str) -> bytes:
+    buffer = io.BytesIO()
+    if not service.download_to_file(object_key, buffer, digest):
+        raise RuntimeError(f"Download of {object_key} failed")
+    return buffer.getvalue()
+
+
+def run(args):
+    from app.blob_cache import BlobCache
+    from app.s3_service import S3Service
+
+    print("NSF AI App Blob Cache Check")
+    print("=" * 30)
+
+    service = S3Service()
+    try:
+        service.s3_client.create_bucket(Bucket=service.bucket_name)
+    except service.s3_client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    gets = []
+    service.s3_client.meta.events.register("before-call.s3.GetObject", lambda **kwargs: gets.append(1))
+
+    blobs = {}
+    for i in range(3):
+        content = os.urandom(args.size_kb * 1024)
+        object_key = f"checks/blob-{i}.bin"
+        service.s3_client.put_object(Bucket=service.bucket_name, Key=object_key, Body=content)
+        blobs[object_key] = (content, hashlib.sha256(content).hexdigest())
+
+    ok = True
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Room for two of the three blobs.
+        service.cache = BlobCache(cache_dir, max_bytes=2 * args.size_kb * 1024)
+        object_key, (content, digest) = next(iter(blobs.items()))
+
+        for _ in range(3):
+            if _download(service, object_key, digest) != content:
+                print("❌ Cached download returned different bytes")
+                ok = False
+        stats = service.cache.stats()
+        print(f"Repeated download: {len(gets)} GET(s), {stats['hits']} hits, {stats['misses']} misses")
+        if len(gets) != 1 or stats["hits"] != 2:
+            print("❌ Expected one trip to S3 and two cache hits")
+            ok = False
+
+        with open(service.cache.path_for(digest), "r+b") as f:
+            f.write(b"\0")
+        gets.clear()
+        if _download(service, object_key, digest) != content or len(gets) != 1:
+            print("❌ A corrupted cache entry was served instead of being fetched again")
+            ok = False
+        else:
+            print(f"Corrupted entry: detected ({service.cache.stats()['corrupt']}) and fetched again")
+
+        other_key, (other_content, _) = list(blobs.items())[1]
+        wrong_digest = hashlib.sha256(b"not the content").hexdigest()
+        if _download(service, other_key, wrong_digest) != other_content or os.path.exists(
+            service.cache.path_for(wrong_digest)
+        ):
+            print("❌ Content with a mismatched digest was cached")
+            ok = False
+        else:
+            print("Mismatched digest: served from S3, not cached")
+
+        for object_key, (content, digest) in blobs.items():
+            _download(service, object_key, digest)
+        stats = service.cache.stats()
+        print(f"After filling past the limit: {stats['entries']} entries, {stats['size_bytes']} bytes, "
+              f"{stats['evictions']} evictions, hit ratio {stats['hit_ratio']:.2f}")
+        if stats["size_bytes"] > stats["max_bytes"] or stats["evictions"] < 1:
+            print("❌ Cache grew past its size limit")
+            ok = False
+
+        restarted = BlobCache(cache_dir, max_bytes=service.cache.max_bytes)
+        if restarted.stats()["entries"] != stats["entries"]:
+            print("❌ A new process did not pick up the cached blobs")
+            ok = False
+
+    for object_key in blobs:
+        service.s3_client.delete_object(Bucket=service.bucket_name, Key=object_key)
+    if not ok:
+        sys.exit(1)
+    print("\n🎉 Blob cache verified!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the local blob cache against a local S3 stand-in")
+    parser.add_argument("--size-kb", type=int, default=512)
+    parser.add_argument("--endpoint-url", help="Use an S3-compatible server such as MinIO instead of moto")
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        os.environ["S3_ENDPOINT_URL"] = args.endpoint_url
+        run(args)
+        return
+
+    from moto import mock_aws
+    with mock_aws():
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,104 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import tempfile
+import time
+
+DOCUMENT = (
+    "The Upili program worked with Safaricom in Nairobi. "
+    "Safaricom funded training for 120 beneficiaries with disabilities in Nairobi."
+)
+
+
+def _subdirectories(path: str):
+    return [entry.name for entry in os.scandir(path) if entry.is_dir()] if os.path.isdir(path) else []
+
+
+def _wait_for_reload(service, version: str, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        service._sync_graph()
+        if service.snapshot_version == version and not service._reload_lock.locked():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def run(args):
+    from app.config import settings
+    from app.graph_snapshots import STAGING_PREFIX
+    from app.graphrag_service import GraphRAGService
+
+    print("NSF AI App Graph Snapshot Check")
+    print("=" * 30)
+
+    ok = True
+    # The writer is part-way through its first publish: a staging directory but no CURRENT yet.
+    os.makedirs(os.path.join(settings.graphrag_snapshot_dir, f"{STAGING_PREFIX}00000001"))
+    reader = GraphRAGService()
+    reader.warm_up()
+    print(f"Reader before the first publish: {reader.warm_up_state}, snapshot {reader.snapshot_version or 'none'}")
+    if reader.warm_up_state != "ready":
+        print(f"❌ Reader failed to start before the first snapshot: {reader.warm_up_error}")
+        ok = False
+
+    settings.graphrag_role = "writer"
+    writer = GraphRAGService()
+    writer.add_documents([DOCUMENT])
+    version = writer.snapshots.current_version()
+    settings.graphrag_role = "reader"
+    print(f"Writer published snapshot {version or 'none'}")
+    if version is None:
+        print("❌ The writer did not publish a snapshot")
+        ok = False
+
+    leftovers = _subdirectories(settings.graphrag_working_dir)
+    if leftovers:
+        print(f"❌ Directories in the working directory break fast_graphrag: {', '.join(leftovers)}")
+        ok = False
+
+    if version is not None and reader.warm_up_state == "ready":
+        if not _wait_for_reload(reader, version, args.timeout):
+            print("❌ The running reader did not pick up the published snapshot")
+            ok = False
+        else:
+            print(f"Running reader reloaded snapshot {reader.snapshot_version}")
+
+    restarted = GraphRAGService()
+    restarted.warm_up()
+    print(f"Restarted reader: {restarted.warm_up_state}, snapshot {restarted.snapshot_version or 'none'}")
+    if restarted.warm_up_state != "ready" or restarted.snapshot_version != version:
+        print("❌ A restarted reader did not open the published snapshot")
+        ok = False
+
+    if not ok:
+        sys.exit(1)
+    print("\n🎉 Graph snapshots verified!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check snapshot publishing between a writer and readers with the fake LLM provider")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for a reader to reload")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update(
+            LLM_PROVIDER="fake",
+            GRAPHRAG_ROLE="reader",
+            GRAPHRAG_WARM_UP="false",
+            GRAPHRAG_RELOAD_POLL_SECONDS="0",
+            GRAPHRAG_WORKING_DIR=os.path.join(workdir, "graph"),
+            GRAPHRAG_SNAPSHOT_DIR=os.path.join(workdir, "snapshots"),
+        )
+        for name, value in (("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'check.db')}"), ("SECRET_KEY", "check"),
+                            ("AWS_ACCESS_KEY_ID", "check"), ("AWS_SECRET_ACCESS_KEY", "check"),
+                            ("S3_BUCKET_NAME", "check")):
+            os.environ.setdefault(name, value)
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,114 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import inspect
+import tempfile
+from datetime import datetime, timedelta
+from fastapi import Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, User, Conversation, Message
+from app.routers.admin import get_all_users, get_all_conversations
+from app.routers.chat import get_conversations
+from app.pagination import NEXT_CURSOR_HEADER
+
+ROW_COUNTS = [5, 50]
+PAGE_SIZE = 20
+
+
+class StatementCounter:
+    def __init__(self, *engines):
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def seed(db, users: int):
+    start = datetime(2024, 1, 1)
+    for i in range(users):
+        user = User(email=f"user{i}@example.com", password_hash="x", role="staff")
+        db.add(user)
+        db.flush()
+        for j in range(3):
+            conversation = Conversation(
+                user_id=user.id,
+                title=f"Conversation {j}",
+                created_at=start + timedelta(minutes=i * 3 + j),
+                message_count=j + 1
+            )
+            db.add(conversation)
+            db.flush()
+            db.add_all(
+                Message(conversation_id=conversation.id, user_message="q", ai_response="a")
+                for _ in range(j + 1)
+            )
+    db.commit()
+    return db.query(User).first()
+
+
+async def walk_pages(endpoint, db, user, counter):
+    """Follow the cursor through every page, returning the statements used per page and the rows seen."""
+    statements, rows, cursor = [], 0, None
+    while True:
+        response = Response()
+        before = counter.count
+        page = endpoint(response=response, cursor=cursor, limit=PAGE_SIZE, db=db, **user)
+        if inspect.isawaitable(page):
+            page = await page
+        statements.append(counter.count - before)
+        rows += len(page)
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return statements, rows
+
+
+async def measure(users: int):
+    # A file database so the sync and async engines see the same rows.
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "query_counts.db")
+        engine = create_engine(f"sqlite:///{path}")
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        async_db = async_sessionmaker(async_engine, expire_on_commit=False)()
+        first_user = seed(db, users)
+        counter = StatementCounter(engine, async_engine.sync_engine)
+
+        results = {
+            "admin users": await walk_pages(get_all_users, db, {"admin_user": first_user}, counter),
+            "admin conversations": await walk_pages(get_all_conversations, db, {"admin_user": first_user}, counter),
+            "chat conversations": await walk_pages(get_conversations, async_db, {"current_user": first_user}, counter),
+        }
+        db.close()
+        await async_db.close()
+        await async_engine.dispose()
+        engine.dispose()
+    return results
+
+
+def main():
+    print("Query count regression check")
+    print("=" * 30)
+
+    failed = False
+    for users in ROW_COUNTS:
+        for name, (statements, rows) in asyncio.run(measure(users)).items():
+            ok = len(set(statements)) == 1
+            failed = failed or not ok
+            print(f"{'✅' if ok else '❌'} {name}: {users} users, {rows} rows, statements per page {statements}")
+
+    if failed:
+        print("\n❌ Statement count grows with the number of rows")
+        sys.exit(1)
+    print("\n🎉 Statement count is constant per page")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,180 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import hashlib
+import io
+import tempfile
+
+SECTIONS = {
+    "Upili in Nairobi": "The Upili program worked with Safaricom in Nairobi. Safaricom funded training for 120 beneficiaries.",
+    "Ajira Digital in Mombasa": "Ajira Digital partnered with Equity Bank in Mombasa. Equity Bank placed 45 graduates in remote work.",
+    "Bridge Academy in Kisumu": "Bridge Academy ran assessments with Kenya Red Cross in Kisumu for 80 learners.",
+    "Career Pathways in Eldoret": "Career Pathways worked with Microsoft in Eldoret on workplace accommodations.",
+}
+# The revision rewrites one section, drops another and adds a new one.
+REVISED = {
+    **{heading: text for heading, text in SECTIONS.items() if heading != "Career Pathways in Eldoret"},
+    "Bridge Academy in Kisumu": "Bridge Academy ran assessments with Kenya Red Cross in Kisumu for 95 learners.",
+    "Tech Inclusion in Nakuru": "Tech Inclusion trained 60 developers with Mastercard Foundation in Nakuru.",
+}
+
+
+def make_document(sections) -> bytes:
+    import docx
+
+    document = docx.Document()
+    document.add_heading("Impact Report", level=1)
+    for heading, text in sections.items():
+        document.add_heading(heading, level=2)
+        document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _drain(run_worker, db, models):
+    IngestionJob, GraphRemoval, active = models
+    while True:
+        db.expire_all()
+        pending = db.query(IngestionJob).filter(IngestionJob.status.in_(active)).count()
+        removals = db.query(GraphRemoval).count()
+        if not pending and not removals:
+            return
+        run_worker(once=True)
+
+
+def _graph_sections(graphrag_service, working_dir: str):
+    grag = graphrag_service._build_graph(working_dir)
+    graphrag_service._load_stores(grag)
+    chunks = (grag.state_manager.chunk_storage._data or {}).values()
+    return {(chunk.metadata or {}).get("section_hash") for chunk in chunks}
+
+
+def run(args):
+    from fastapi.testclient import TestClient
+
+    from app.auth import get_password_hash
+    from app.config import settings
+    from app.database import SessionLocal, engine
+    from app.graphrag_service import graphrag_service
+    from app.ingestion import JOB_DONE, JOB_EXTRACTING, JOB_INSERTING, JOB_QUEUED, run_worker
+    from app.main import app
+    from app.models import Base, Document, DocumentChunk, GraphRemoval, IngestionJob, User
+    from app.s3_service import s3_service
+
+    print("NSF AI App Re-processing Check")
+    print("=" * 30)
+
+    Base.metadata.create_all(bind=engine)
+    s3_service.s3_client.create_bucket(Bucket=s3_service.bucket_name)
+    db = SessionLocal()
+    db.add(User(email="check@example.org", password_hash=get_password_hash("check"), role="admin"))
+    db.commit()
+    models = (IngestionJob, GraphRemoval, (JOB_QUEUED, JOB_EXTRACTING, JOB_INSERTING))
+
+    inserted, removed = [], []
+    add_documents, remove_sections = graphrag_service.add_documents, graphrag_service.remove_sections
+
+    def record_insert(contents, metadata=None):
+        inserted.extend(item["section_hash"] for item in metadata or [])
+        return add_documents(contents, metadata)
+
+    def record_removal(section_hashes):
+        section_hashes = set(section_hashes)
+        removed.extend(section_hashes)
+        return remove_sections(section_hashes)
+
+    graphrag_service.add_documents, graphrag_service.remove_sections = record_insert, record_removal
+
+    def sections_of(document_id: int):
+        db.expire_all()
+        return {row.content_hash for row in db.query(DocumentChunk.content_hash).filter(DocumentChunk.document_id == document_id)}
+
+    ok = True
+    with TestClient(app) as client:
+        token = client.post("/api/auth/login", data={"username": "check@example.org", "password": "check"}).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+        response = client.post(
+            "/api/documents/upload",
+            files={"file": ("report.docx", make_document(SECTIONS), "application/octet-stream")},
+            headers=headers
+        )
+        response.raise_for_status()
+        document_id = response.json()["document_id"]
+        client.post(f"/api/documents/process/{document_id}", headers=headers).raise_for_status()
+        _drain(run_worker, db, models)
+        before = sections_of(document_id)
+        print(f"First pass: {len(inserted)} sections inserted, {len(before)} recorded")
+
+        # Replace the stored file with the revised report, as a re-upload of the same document would.
+        revised = make_document(REVISED)
+        document = db.query(Document).filter(Document.id == document_id).first()
+        s3_service.s3_client.put_object(Bucket=s3_service.bucket_name, Key=document.s3_key, Body=revised)
+        document.content_hash = hashlib.sha256(revised).hexdigest()
+        document.file_size = len(revised)
+        db.commit()
+        inserted.clear()
+
+        status = client.post(f"/api/documents/process/{document_id}", headers=headers).json()["status"]
+        if status != JOB_DONE:
+            print(f"❌ Processing a finished document again without reprocess queued it ({status})")
+            ok = False
+        status = client.post(f"/api/documents/process/{document_id}?reprocess=true", headers=headers).json()["status"]
+        if status != JOB_QUEUED:
+            print(f"❌ reprocess=true did not queue the document ({status})")
+            ok = False
+        _drain(run_worker, db, models)
+        after = sections_of(document_id)
+
+    print(f"Re-processing: {len(inserted)} sections inserted, {len(removed)} removed, {len(after & before)} unchanged")
+    if set(inserted) != after - before:
+        print("❌ Expected only the new and changed sections to be inserted")
+        ok = False
+    if set(removed) != before - after:
+        print("❌ Expected the sections the revision dropped to be removed from the graph")
+        ok = False
+    if not after - before or not before - after:
+        print("❌ The revision should both add and drop sections")
+        ok = False
+    in_graph = _graph_sections(graphrag_service, settings.graphrag_working_dir)
+    if in_graph != after:
+        print(f"❌ The graph holds {len(in_graph - after)} stale and misses {len(after - in_graph)} current sections")
+        ok = False
+
+    db.close()
+    if not ok:
+        sys.exit(1)
+    print("\n🎉 Re-processing verified!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that re-processing a revised document only touches its changed sections")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update(
+            LLM_PROVIDER="fake",
+            GRAPHRAG_ROLE="standalone",
+            GRAPHRAG_WARM_UP="false",
+            GRAPHRAG_WORKING_DIR=os.path.join(workdir, "graph"),
+            DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'check.db')}",
+            INGESTION_RETRY_BACKOFF_SECONDS="0",
+            # Small enough that each heading of the report starts its own section.
+            CHUNK_MAX_CHARS="400",
+            S3_CACHE_DIR=os.path.join(workdir, "s3_cache"),
+        )
+        for name, value in (("SECRET_KEY", "check"), ("AWS_ACCESS_KEY_ID", "check"),
+                            ("AWS_SECRET_ACCESS_KEY", "check"), ("S3_BUCKET_NAME", "nsf-check")):
+            os.environ.setdefault(name, value)
+
+        from moto import mock_aws
+        with mock_aws():
+            run(args)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
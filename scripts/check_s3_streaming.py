@@ -0,0 +1,140 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import hashlib
+import math
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BLOCK_SIZE = 1024 * 1024
+SAMPLE_INTERVAL = 0.02
+TRACE_FRAMES = 32
+OVERHEAD_MB = 2
+STAND_IN_MODULES = ("moto", "responses", "werkzeug")
+
+
+def _write_sample(path: str, size_mb: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            block = os.urandom(BLOCK_SIZE)
+            digest.update(block)
+            f.write(block)
+    return digest.hexdigest()
+
+
+def _hash_path(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _client_megabytes() -> float:
+    # Leave out what the local stand-in allocates to hold and serve the object; a real S3 does that remotely.
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.Filter(False, f"*{os.sep}{module}{os.sep}*", all_frames=True) for module in STAND_IN_MODULES]
+    )
+    return sum(stat.size for stat in snapshot.statistics("filename")) / BLOCK_SIZE
+
+
+def _measure(fn):
+    """Run fn, sampling the client's traced memory while it runs."""
+    samples = []
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            samples.append(_client_megabytes())
+            done.wait(SAMPLE_INTERVAL)
+
+    tracemalloc.start(TRACE_FRAMES)
+    baseline = _client_megabytes()
+    sampler = threading.Thread(target=sample, daemon=True)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        result = fn()
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+        tracemalloc.stop()
+    return result, elapsed, max(samples, default=baseline) - baseline
+
+
+def run(args):
+    from app.config import settings
+    from app.s3_service import S3Service
+
+    print("NSF AI App S3 Streaming Check")
+    print("=" * 30)
+
+    service = S3Service()
+    try:
+        service.s3_client.create_bucket(Bucket=service.bucket_name)
+    except service.s3_client.exceptions.BucketAlreadyOwnedByYou:
+        pass
+
+    object_key = "checks/streaming.bin"
+    ok = True
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, "source.bin")
+        expected = _write_sample(source, args.size_mb)
+
+        with open(source, "rb") as f:
+            uploaded, seconds, peak = _measure(lambda: service.upload_file(f, object_key))
+        etag = service.s3_client.head_object(Bucket=service.bucket_name, Key=object_key)["ETag"].strip('"')
+        parts = int(etag.split("-")[1]) if "-" in etag else 1
+        expected_parts = math.ceil(args.size_mb * BLOCK_SIZE / settings.s3_part_size)
+        # Parts in flight plus the one being read, and a little for the client's own bookkeeping.
+        bound = settings.s3_part_size * (settings.s3_max_concurrency + 1) / BLOCK_SIZE + OVERHEAD_MB
+        print(f"Upload: {args.size_mb}MB in {seconds:.2f}s, {parts} parts, peak {peak:.1f}MB (bound {bound:.0f}MB)")
+        if not uploaded or parts != expected_parts:
+            print(f"❌ Expected a multipart upload of {expected_parts} parts")
+            ok = False
+        elif peak > bound:
+            print("❌ Upload memory is not bounded by part size x concurrency")
+            ok = False
+
+        target = os.path.join(workdir, "target.bin")
+        with open(target, "wb") as f:
+            downloaded, seconds, peak = _measure(lambda: service.download_to_file(object_key, f))
+        print(f"Ranged download: {seconds:.2f}s, peak {peak:.1f}MB (bound {bound:.0f}MB)")
+        if not downloaded or _hash_path(target) != expected:
+            print("❌ Downloaded file does not match the upload")
+            ok = False
+        elif peak > bound:
+            print("❌ Download memory is not bounded by part size x concurrency")
+            ok = False
+
+    service.s3_client.delete_object(Bucket=service.bucket_name, Key=object_key)
+    if not ok:
+        sys.exit(1)
+    print("\n🎉 Streaming transfers verified!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check streaming S3 transfers against a local S3 stand-in")
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--endpoint-url", help="Use an S3-compatible server such as MinIO instead of moto")
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        os.environ["S3_ENDPOINT_URL"] = args.endpoint_url
+        run(args)
+        return
+
+    from moto import mock_aws
+    with mock_aws():
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from app.config import settings
+from app.graph_snapshots import store_sizes
+from app.graphrag_service import graphrag_service
+
+
+def measure(path: str, repeat: int):
+    """Bytes on disk, best of repeat loads of every store, and what the graph holds."""
+    from fast_graphrag._utils import get_event_loop
+
+    size = sum(store_sizes(path).values())
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        grag = graphrag_service._build_graph(path)
+        graphrag_service._load_stores(grag)
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    state_manager = grag.state_manager
+    loop = get_event_loop()
+    counts = {
+        "chunks": loop.run_until_complete(state_manager.chunk_storage.size()),
+        "relationships": loop.run_until_complete(state_manager.graph_storage.edge_count()),
+        "entities": loop.run_until_complete(state_manager.graph_storage.node_count()),
+    }
+    return size, seconds, counts
+
+
+def referenced_sections():
+    from app.database import SessionLocal
+    from app.models import DocumentChunk
+
+    db = SessionLocal()
+    try:
+        return {row.content_hash for row in db.query(DocumentChunk.content_hash).distinct()}
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rewrite the knowledge graph without orphaned chunks, relationships and entities")
+    parser.add_argument("--database", action="store_true",
+                        help="Also drop chunks whose section no document in the database references")
+    parser.add_argument("--repeat", type=int, default=3, help="Loads to time before and after; the best one counts")
+    args = parser.parse_args()
+
+    print("NSF AI App Knowledge Graph Compaction")
+    print("=" * 30)
+    if settings.graphrag_role == "reader":
+        print("❌ GRAPHRAG_ROLE=reader cannot write the graph; run this with the worker's settings")
+        sys.exit(1)
+
+    before_path, version = graphrag_service._graph_location()
+    print(f"Graph: {before_path} (snapshot {version or 'none'})")
+    before_size, before_seconds, before_counts = measure(before_path, args.repeat)
+
+    sections = None
+    if args.database:
+        sections = referenced_sections()
+        print(f"{len(sections)} sections are referenced by documents")
+
+    try:
+        result = graphrag_service.compact(sections)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    print(f"Removed {result.chunks} chunks, {result.relationships} relationships, {result.entities} entities")
+
+    after_path, version = graphrag_service._graph_location()
+    after_size, after_seconds, after_counts = measure(after_path, args.repeat)
+
+    for name in ("chunks", "relationships", "entities"):
+        print(f"  {name}: {before_counts[name]} -> {after_counts[name]}")
+    print(f"  size: {before_size / 1024:.1f}KB -> {after_size / 1024:.1f}KB "
+          f"(saved {(before_size - after_size) / 1024:.1f}KB)")
+    print(f"  load: {before_seconds * 1000:.1f}ms -> {after_seconds * 1000:.1f}ms "
+          f"(saved {(before_seconds - after_seconds) * 1000:.1f}ms)")
+
+    print(f"\n🎉 Compaction complete! Graph: {after_path} (snapshot {version or 'none'})")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
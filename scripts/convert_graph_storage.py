@@ -0,0 +1,110 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import pickle
+import time
+
+import numpy as np
+
+from app.graph_storage import MmapBlobStorage, MmapChunkStorage, read_mapped_file
+
+CHUNK_STORES = ["chunks"]
+BLOB_STORES = ["map_e2r", "map_r2c"]
+
+
+def _timed_pickle_load(path):
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        data = pickle.load(f)
+    return data, time.perf_counter() - start
+
+
+def _timed_mapped_load(path):
+    start = time.perf_counter()
+    mapped = read_mapped_file(path)
+    return mapped, time.perf_counter() - start
+
+
+def convert_chunks(working_dir: str, namespace: str, remove_pickles: bool) -> bool:
+    source = os.path.join(working_dir, f"{namespace}_{MmapChunkStorage.PICKLE_RESOURCE_NAME}")
+    target = os.path.join(working_dir, f"{namespace}_{MmapChunkStorage.RESOURCE_NAME}")
+    if not os.path.exists(source):
+        print(f"⏭️  {namespace}: no pickled chunk storage")
+        return True
+
+    (data, free_indices, key_to_index), pickle_seconds = _timed_pickle_load(source)
+    MmapChunkStorage.write(target, data, key_to_index)
+    (meta, arrays), mapped_seconds = _timed_mapped_load(target)
+
+    if meta["size"] != len(data):
+        print(f"❌ {namespace}: wrote {meta['size']} chunks, expected {len(data)}")
+        return False
+    for key, index in key_to_index.items():
+        if arrays["keys"][index] != key or not arrays["valid"][index]:
+            print(f"❌ {namespace}: key {key} is not at index {index}")
+            return False
+
+    print(f"✅ {namespace}: {len(data)} chunks, load {pickle_seconds * 1000:.1f}ms pickled -> "
+          f"{mapped_seconds * 1000:.1f}ms mapped")
+    if remove_pickles:
+        os.remove(source)
+    return True
+
+
+def convert_blob(working_dir: str, namespace: str, remove_pickles: bool) -> bool:
+    source = os.path.join(working_dir, f"{namespace}_{MmapBlobStorage.PICKLE_RESOURCE_NAME}")
+    target = os.path.join(working_dir, f"{namespace}_{MmapBlobStorage.RESOURCE_NAME}")
+    if not os.path.exists(source):
+        print(f"⏭️  {namespace}: no pickled blob storage")
+        return True
+
+    blob, pickle_seconds = _timed_pickle_load(source)
+    MmapBlobStorage.write(target, blob)
+    (meta, arrays), mapped_seconds = _timed_mapped_load(target)
+
+    if blob is not None:
+        if tuple(meta["shape"]) != blob.shape or not all(
+            np.array_equal(arrays[name], getattr(blob, name)) for name in ("data", "indices", "indptr")
+        ):
+            print(f"❌ {namespace}: mapped matrix differs from the pickled one")
+            return False
+        shape = "x".join(str(n) for n in blob.shape)
+    else:
+        shape = "empty"
+
+    print(f"✅ {namespace}: {shape}, load {pickle_seconds * 1000:.1f}ms pickled -> "
+          f"{mapped_seconds * 1000:.1f}ms mapped")
+    if remove_pickles:
+        os.remove(source)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert pickled knowledge base stores to memory-mapped files")
+    parser.add_argument("--working-dir", help="Defaults to GRAPHRAG_WORKING_DIR")
+    parser.add_argument("--remove-pickles", action="store_true",
+                        help="Delete each pickle once its mapped file has been verified")
+    args = parser.parse_args()
+
+    working_dir = args.working_dir
+    if working_dir is None:
+        from app.config import settings
+        working_dir = settings.graphrag_working_dir
+
+    print("NSF AI App Knowledge Base Conversion")
+    print("=" * 30)
+    print(f"Working directory: {working_dir}")
+
+    ok = all([convert_chunks(working_dir, namespace, args.remove_pickles) for namespace in CHUNK_STORES]
+             + [convert_blob(working_dir, namespace, args.remove_pickles) for namespace in BLOB_STORES])
+    if not ok:
+        sys.exit(1)
+
+    print("\n🎉 Conversion complete! Set GRAPHRAG_STORAGE_BACKEND=mmap to serve from the mapped files.")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
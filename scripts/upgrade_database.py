@@ -0,0 +1,75 @@
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from app.models import Base
+from app.database import engine
+
+# Columns added to existing tables after their first release: (table, column, DDL type)
+ADDED_COLUMNS = [
+    ("documents", "content_hash", "VARCHAR(64)"),
+    ("documents", "text_hash", "VARCHAR(64)"),
+    ("conversations", "message_count", "INTEGER NOT NULL DEFAULT 0"),
+    ("conversations", "last_message_at", "TIMESTAMP"),
+]
+
+ADDED_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash)",
+    "CREATE INDEX IF NOT EXISTS ix_documents_text_hash ON documents (text_hash)",
+    "CREATE INDEX IF NOT EXISTS ix_conversations_user_id_created_at ON conversations (user_id, created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_conversations_created_at ON conversations (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_messages_conversation_id_timestamp ON messages (conversation_id, timestamp)",
+]
+
+BACKFILL_CONVERSATION_COUNTERS = """
+UPDATE conversations SET
+    message_count = (SELECT COUNT(*) FROM messages WHERE messages.conversation_id = conversations.id),
+    last_message_at = (SELECT MAX(timestamp) FROM messages WHERE messages.conversation_id = conversations.id)
+"""
+
+
+def create_new_tables():
+    print("Creating missing tables...")
+    Base.metadata.create_all(bind=engine)
+    print("✅ Tables up to date")
+
+
+def add_missing_columns():
+    print("Adding missing columns...")
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, column, column_type in ADDED_COLUMNS:
+            existing = {col["name"] for col in inspector.get_columns(table)}
+            if column in existing:
+                continue
+            connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+            print(f"Added {table}.{column}")
+        for statement in ADDED_INDEXES:
+            connection.execute(text(statement))
+    print("✅ Columns up to date")
+
+
+def backfill_counters():
+    print("Backfilling conversation counters...")
+    with engine.begin() as connection:
+        result = connection.execute(text(BACKFILL_CONVERSATION_COUNTERS))
+    print(f"✅ {result.rowcount} conversations updated")
+
+
+def main():
+    print("NSF AI App Database Upgrade")
+    print("=" * 30)
+
+    try:
+        create_new_tables()
+        add_missing_columns()
+        backfill_counters()
+        print("\n🎉 Database upgrade complete!")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file